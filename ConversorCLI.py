@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from ConversorCore import REPORT_KEYS, run_job
+from ConversorTrace import tracer
+
+# Exemplo de job (JSON ou YAML):
+# {
+#     "excel_target": "modelos/P01.xlsx",
+#     "report_daytime_a": "reports/P01_A_dia.csv",
+#     "report_daytime_b": ["reports/P01_B_dia1.csv", "reports/P01_B_dia2.csv"],
+#     "report_evening_a": "reports/P01_A_noite.csv",
+#     "report_evening_b": "reports/P01_B_noite.csv",
+#     "start_diurno": "06:00",
+#     "end_diurno": "18:00",
+#     "days": ["03-03-2025", "04-03-2025", null, "06-03-2025"]
+# }
+# Um manifest é uma lista de jobs, ou {"jobs": [...]}. Caminhos relativos são
+# resolvidos a partir da pasta do arquivo. Cada report pode ser um CSV ou uma
+# lista de CSVs, que são juntados em um só. Sem "days", são usados todos os dias
+# com contagem do primeiro report informado.
+
+
+def load_document(path):
+    with open(path, encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("Para ler arquivos YAML instale o PyYAML (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def resolve_job(job, base_dir):
+    job = dict(job)
+    for key in ["excel_target", "output_folder"] + REPORT_KEYS:
+        if isinstance(job.get(key), list):
+            job[key] = [os.path.join(base_dir, os.path.expanduser(path)) for path in job[key]]
+        elif job.get(key):
+            job[key] = os.path.join(base_dir, os.path.expanduser(job[key]))
+    if not job.get("excel_target"):
+        raise ValueError("Job sem excel_target")
+    # Caminho relativo ao manifest, para distinguir templates com o mesmo nome
+    # em pastas diferentes
+    job.setdefault(
+        "name", os.path.splitext(os.path.relpath(job["excel_target"], base_dir))[0]
+    )
+    return job
+
+
+def load_jobs(path):
+    document = load_document(path)
+    jobs = document.get("jobs", [document]) if isinstance(document, dict) else document
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = [resolve_job(job, base_dir) for job in jobs]
+
+    # Dois jobs no mesmo workbook se sobrescreveriam quando rodando em paralelo
+    targets = [os.path.abspath(job["excel_target"]) for job in jobs]
+    duplicated = sorted({t for t in targets if targets.count(t) > 1})
+    if duplicated:
+        raise ValueError(f"Mais de um job para o mesmo arquivo Excel: {duplicated}")
+
+    # Nomes repetidos (dados no próprio job) ganham um sufixo no resumo
+    seen = {}
+    for job in jobs:
+        count = seen[job["name"]] = seen.get(job["name"], 0) + 1
+        if count > 1:
+            job["name"] = f"{job['name']} ({count})"
+    return jobs
+
+
+def execute_job(job, trace=False):
+    # Roda em um processo próprio; erros são devolvidos no resultado, nunca propagados
+    if trace:
+        tracer.enable()
+    started = time.perf_counter()
+
+    def log(message):
+        print(f"[{job['name']}] {message}", flush=True)
+
+    try:
+        run_job(job, log)
+        status, error = "ok", None
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        log(traceback.format_exc())
+    return {
+        "name": job["name"],
+        "excel_target": job["excel_target"],
+        "status": status,
+        "seconds": round(time.perf_counter() - started, 3),
+        "error": error,
+        "trace": tracer.drain() if trace else [],
+    }
+
+
+def run_jobs(jobs, workers=None, trace=False):
+    execute = partial(execute_job, trace=trace)
+    if workers == 1 or len(jobs) == 1:
+        return [execute(job) for job in jobs]
+
+    # max_tasks_per_child=1 isola cada job em um processo novo
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        return list(pool.map(execute, jobs))
+
+
+def print_summary(results, total_seconds):
+    print()
+    print(f"{'Job':<30} {'Status':<8} {'Tempo (s)':>10}")
+    for result in results:
+        print(f"{result['name']:<30} {result['status']:<8} {result['seconds']:>10.2f}")
+        if result["error"]:
+            print(f"    {result['error']}")
+    failures = sum(1 for result in results if result["status"] != "ok")
+    print(f"\n{len(results)} job(s), {failures} falha(s), {total_seconds:.2f}s no total")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reports Converter sem interface gráfica")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostra as mensagens de depuração")
+    parser.add_argument("--streaming", action="store_true", help="Lê os CSVs em partes, mantendo em memória só os dias usados")
+    parser.add_argument("--no-disk-cache", action="store_true", help="Não usa o cache em disco dos reports já lidos")
+    parser.add_argument("--no-direct-xlsx", action="store_true", help="Carrega e grava o workbook inteiro com openpyxl")
+    parser.add_argument("--no-resume", action="store_true", help="Refaz todos os blocos, ignorando o checkpoint da última execução")
+    parser.add_argument("--trace", metavar="PREFIXO", help="Grava o tempo de cada etapa em PREFIXO.json e PREFIXO.trace.json (formato Chrome)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Processa um único job")
+    run_parser.add_argument("job", help="Arquivo JSON/YAML com o job")
+
+    batch_parser = subparsers.add_parser("batch", help="Processa um manifest de jobs em paralelo")
+    batch_parser.add_argument("manifest", help="Arquivo JSON/YAML com a lista de jobs")
+    batch_parser.add_argument("-w", "--workers", type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    batch_parser.add_argument("--summary", help="Grava o resumo dos jobs neste arquivo JSON")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    started = time.perf_counter()
+    trace = bool(args.trace)
+    jobs = load_jobs(args.job if args.command == "run" else args.manifest)
+    for job in jobs:
+        if args.streaming:
+            job["streaming"] = True
+        if args.no_disk_cache:
+            job["disk_cache"] = False
+        if args.no_direct_xlsx:
+            job["direct_xlsx"] = False
+        if args.no_resume:
+            job["resume"] = False
+    if args.command == "run":
+        results = run_jobs(jobs, workers=1, trace=trace)
+    else:
+        results = run_jobs(jobs, workers=args.workers, trace=trace)
+    total_seconds = time.perf_counter() - started
+
+    spans = [span for result in results for span in result.pop("trace")]
+    if trace:
+        tracer.export(args.trace, spans)
+
+    print_summary(results, total_seconds)
+    if getattr(args, "summary", None):
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump({"seconds": round(total_seconds, 3), "jobs": results}, f, indent=2, ensure_ascii=False)
+
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
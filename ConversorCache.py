@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Cache em disco dos reports já lidos, para que reabrir um CSV conhecido não
+# exija ler e converter tudo de novo. Cada report fica em uma pasta com uma
+# coluna por arquivo .npy (carregado com mmap) e um meta.json. A chave é o hash
+# do conteúdo do CSV, então renomear ou copiar o arquivo não invalida o cache.
+#
+# Pasta padrão: %LOCALAPPDATA%/ReportsConverter/cache no Windows e
+# ~/.cache/reports-converter nos outros sistemas (CONVERSOR_CACHE_DIR muda a pasta).
+# Tamanho máximo: CONVERSOR_CACHE_MAX_MB (padrão 512); os reports usados há mais
+# tempo são removidos primeiro.
+
+CACHE_DIR_ENV = "CONVERSOR_CACHE_DIR"
+CACHE_MAX_MB_ENV = "CONVERSOR_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 512
+
+# Mudar sempre que o resultado do parse_report mudar, para invalidar o cache
+CACHE_FORMAT_VERSION = "2"
+
+
+def default_cache_dir():
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return os.path.join(os.environ["LOCALAPPDATA"], "ReportsConverter", "cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "reports-converter")
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskReportCache:
+    def __init__(self, folder=None, max_bytes=None):
+        self.folder = folder or default_cache_dir()
+        if max_bytes is None:
+            max_bytes = int(os.environ.get(CACHE_MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._index_path = os.path.join(self.folder, "index.json")
+
+    # Hash do conteúdo, memorizado por caminho + mtime + tamanho para não reler
+    # o CSV inteiro a cada abertura
+    def _read_index(self):
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        self._write_json(self._index_path, index)
+
+    def _write_json(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def key_for(self, csv_file):
+        path = os.path.abspath(csv_file)
+        stat = os.stat(path)
+        index = self._read_index()
+        entry = index.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            content_hash = entry[2]
+        else:
+            content_hash = file_hash(path)
+            index[path] = [stat.st_mtime_ns, stat.st_size, content_hash]
+            self._write_index(index)
+        return f"{content_hash}-v{CACHE_FORMAT_VERSION}"
+
+    def load(self, csv_file):
+        entry_dir = os.path.join(self.folder, self.key_for(csv_file))
+        meta_path = os.path.join(entry_dir, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            columns = {
+                name: np.load(os.path.join(entry_dir, f"{i}.npy"), mmap_mode="r")
+                for i, name in enumerate(meta["columns"])
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+        os.utime(meta_path)  # Marca como usado agora (ordem do LRU)
+        date_column = meta["date_column"]
+        df = pd.DataFrame(columns)
+        df.index = pd.DatetimeIndex(df[date_column])
+        return df, date_column
+
+    def store(self, csv_file, report):
+        df, date_column = report
+        if any(df[col].dtype == object for col in df.columns):
+            return  # Só colunas numéricas/datas vão para o cache
+
+        os.makedirs(self.folder, exist_ok=True)
+        entry_dir = os.path.join(self.folder, self.key_for(csv_file))
+        if os.path.exists(entry_dir):
+            return
+
+        # Grava em uma pasta temporária e renomeia, para nunca deixar entrada pela metade
+        tmp_dir = tempfile.mkdtemp(dir=self.folder, prefix=".tmp-")
+        try:
+            for i, col in enumerate(df.columns):
+                np.save(os.path.join(tmp_dir, f"{i}.npy"), df[col].to_numpy())
+            self._write_json(
+                os.path.join(tmp_dir, "meta.json"),
+                {
+                    "date_column": date_column,
+                    "columns": [str(col) for col in df.columns],
+                    "source": os.path.abspath(csv_file),
+                    "created": time.time(),
+                },
+            )
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def entries(self):
+        # [(último uso, tamanho em bytes, pasta)] das entradas completas
+        result = []
+        for name in os.listdir(self.folder):
+            entry_dir = os.path.join(self.folder, name)
+            meta_path = os.path.join(entry_dir, "meta.json")
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry_dir, f)) for f in os.listdir(entry_dir)
+            )
+            result.append((os.path.getmtime(meta_path), size, entry_dir))
+        return result
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
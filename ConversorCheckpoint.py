@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+
+from ConversorCache import file_hash
+
+# Checkpoint de cada workbook processado, em <template>.checkpoint.json ao lado do
+# arquivo. Guarda o hash do workbook depois do último save e, para cada bloco
+# gravado (configuração, grupo, dia), o hash dos CSVs, a data, a faixa de horário
+# e a linha inicial. Numa nova execução, os blocos com a mesma assinatura não são
+# lidos nem escritos de novo, desde que o workbook não tenha mudado desde então;
+# só o que falta (blocos que deram erro) ou mudou é refeito.
+
+# 2: blocos posicionados por intervalo de 15 minutos (ver split_report); os
+# gravados antes disso podem estar deslocados e são refeitos
+CHECKPOINT_VERSION = 2
+
+
+def checkpoint_path(excel_target):
+    return os.path.splitext(excel_target)[0] + ".checkpoint.json"
+
+
+class RunCheckpoint:
+    def __init__(self, excel_target):
+        self.excel_target = excel_target
+        self.path = checkpoint_path(excel_target)
+        self._hashes = {}
+        self._committed = {}
+        self.blocks = {}
+        self.titles = None
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Workbook alterado (ou trocado) depois do checkpoint: tudo é refeito
+        if (
+            manifest.get("version") == CHECKPOINT_VERSION
+            and manifest.get("target") == file_hash(excel_target)
+        ):
+            self.blocks = manifest.get("blocks", {})
+            self.titles = manifest.get("titles")
+
+    def input_hashes(self, report_paths):
+        hashes = []
+        for path in report_paths:
+            if path not in self._hashes:
+                self._hashes[path] = file_hash(path)
+            hashes.append(self._hashes[path])
+        return hashes
+
+    def is_current(self, key, signature):
+        return self.blocks.get(key) == signature
+
+    def commit(self, key, signature):
+        # Só vai para o arquivo no save, depois que o workbook foi gravado
+        self._committed[key] = signature
+
+    def save(self, titles):
+        manifest = {
+            "version": CHECKPOINT_VERSION,
+            "target": file_hash(self.excel_target),
+            "titles": titles,
+            "blocks": {**self.blocks, **self._committed},
+        }
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.blocks = manifest["blocks"]
+        self.titles = titles
+        self._committed = {}
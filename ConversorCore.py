@@ -0,0 +1,1301 @@
+import errno
+import importlib.util
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.worksheet.cell_range import CellRange
+
+from ConversorCache import DiskReportCache
+from ConversorCheckpoint import RunCheckpoint
+from ConversorReports import is_csv_report, report_files, report_key, report_name
+from ConversorTrace import NULL_SPAN, span
+from ConversorXlsx import XlsxWorkbook
+
+logger = logging.getLogger("conversor")
+
+
+# O template tem uma linha por intervalo de 15 minutos: o dia d começa na linha
+# 17 + 103 * d (linhas 0-based na convenção do to_excel, como o startrow).
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def slot_row_table(
+    start_row_base=16, interval_minutes=SLOT_MINUTES, increment=103, num_values=7
+):
+    # Tabela [dia, intervalo] -> linha do template
+    slots = np.arange(24 * 60 // interval_minutes)
+    return start_row_base + slots + increment * np.arange(num_values)[:, None]
+
+
+def time_slot(time_text, interval_minutes=SLOT_MINUTES):
+    # "HH:MM" -> índice do intervalo de 15 minutos no dia
+    selected_time = datetime.strptime(time_text, "%H:%M")
+    return (selected_time.hour * 60 + selected_time.minute) // interval_minutes
+
+
+def calculate_start_row_array(
+    selected_time, start_row_base=16, interval_minutes=15, increment=103, num_values=7
+):
+    table = slot_row_table(start_row_base, interval_minutes, increment, num_values)
+    return table[:, time_slot(selected_time, interval_minutes)].tolist()
+
+
+# Schema dos reports do PERCI: coluna de data (um dos apelidos abaixo), horaAte e
+# as contagens nas colunas C:P. Só a data e as contagens são lidas do CSV.
+POSSIBLE_DATE_COLUMNS = ["horaDas", "Hora_Das", "hora_das", "HoraDas"]
+END_COLUMN = "horaAte"
+COUNT_COLUMNS_SLICE = slice(2, 16)  # Colunas C:P
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+COUNT_DTYPE = "Int32"  # Inteiro com suporte a células vazias; ver compact_counts
+
+# O leitor do pyarrow é bem mais rápido que o padrão, mas é opcional
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+
+def detect_date_column(df):
+    for col in POSSIBLE_DATE_COLUMNS:
+        if col in df.columns:
+            return col
+    raise ValueError(f"Nenhuma coluna de data encontrada. Colunas disponíveis: {list(df.columns)}")
+
+
+def read_report_schema(csv_file):
+    # Lê só o cabeçalho e devolve (coluna de data, colunas usadas, colunas de contagem)
+    header = pd.read_csv(csv_file, nrows=0)
+    date_column = detect_date_column(header)
+    counts = [
+        col
+        for col in header.columns[COUNT_COLUMNS_SLICE]
+        if col not in (date_column, END_COLUMN)
+    ]
+    usecols = [col for col in header.columns if col == date_column or col in counts]
+    return date_column, usecols, counts
+
+
+def count_columns(df, date_column):
+    # Depois da leitura pelo schema, tudo além da data são contagens (C:P)
+    return [col for col in df.columns if col not in (date_column, END_COLUMN)]
+
+
+def parse_dates(values):
+    dates = pd.to_datetime(values, errors="coerce", format=DATE_FORMAT)
+    if dates.isna().all() and values.notna().any():
+        # Formato diferente do padrão do PERCI: deixa o pandas inferir
+        dates = pd.to_datetime(values, errors="coerce")
+    return dates
+
+
+def compact_counts(df, counts):
+    # int32 para colunas completas; float32 (com NaN) para colunas com células vazias.
+    # Só reduz quando todos os valores são inteiros e cabem no tipo menor (float32
+    # representa inteiros exatamente até 2**24); decimais ou valores grandes ficam
+    # em float64, sem truncar nem estourar.
+    for col in counts:
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        present = values[~np.isnan(values)]
+        integral = bool(np.isfinite(present).all() and (present == np.round(present)).all())
+        largest = np.abs(present).max() if len(present) else 0
+        if not integral:
+            df[col] = values
+        elif len(present) < len(values):
+            df[col] = values.astype("float32") if largest <= 2**24 else values
+        elif largest <= np.iinfo(np.int32).max:
+            df[col] = values.astype("int32")
+        else:
+            df[col] = values
+    return df
+
+
+def coerce_counts(df, counts):
+    # Valores que não são números (texto, etc.) viram célula vazia
+    for col in counts:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def read_report_csv(csv_file, usecols, counts):
+    try:
+        return pd.read_csv(
+            csv_file,
+            usecols=usecols,
+            dtype={col: COUNT_DTYPE for col in counts},
+            engine=CSV_ENGINE,
+        )
+    except (ValueError, TypeError, OverflowError):
+        # Contagem com valor fora do esperado (decimal, texto...): lê sem dtype fixo
+        df = pd.read_csv(csv_file, usecols=usecols)
+        return coerce_counts(df, counts)
+
+
+def iter_report_chunks(csv_file, usecols, counts, chunksize):
+    for chunk in pd.read_csv(csv_file, usecols=usecols, chunksize=chunksize):
+        yield coerce_counts(chunk, counts)
+
+
+def parse_report(csv_file):
+    with span(
+        "parse_csv",
+        file=os.path.basename(csv_file),
+        bytes_read=os.path.getsize(csv_file),
+    ) as trace:
+        date_column, usecols, counts = read_report_schema(csv_file)
+        df = read_report_csv(csv_file, usecols, counts)
+        df[date_column] = parse_dates(df[date_column])
+        df = index_by_time(compact_counts(df, counts), date_column)
+        trace["rows"] = len(df)
+    return df, date_column
+
+
+# Um report pode ser um CSV ou uma lista de CSVs do mesmo movimento (um arquivo
+# por dia, por trecho da câmera...; ver ConversorReports). Os arquivos são lidos
+# em paralelo e juntados em um report só, então o resto do processamento não
+# sabe quantos são.
+REPORT_READ_WORKERS = 4
+
+
+def merge_reports(reports):
+    # Junta os reports já lidos em um só, ordenado pelo horário. Horários repetidos
+    # (arquivos que se sobrepõem) ficam com a primeira ocorrência, na ordem em que
+    # os arquivos foram escolhidos.
+    date_column = reports[0][1]
+    columns = list(reports[0][0].columns)
+    with span("merge_reports", files=len(reports)) as trace:
+        frames = []
+        for df, column in reports:
+            df = df.rename(columns={column: date_column})
+            if sorted(df.columns) != sorted(columns):
+                raise ValueError("Os CSVs escolhidos para o mesmo movimento têm colunas diferentes")
+            frames.append(df[columns])
+        df = pd.concat(frames, ignore_index=True)
+        df = df[~df[date_column].duplicated(keep="first")]
+        df = index_by_time(df, date_column)
+        trace["rows"] = len(df)
+    return df, date_column
+
+
+def parse_reports(report, read=parse_report):
+    paths = report_files(report)
+    if len(paths) == 1:
+        return read(paths[0])
+    with ThreadPoolExecutor(max_workers=min(len(paths), REPORT_READ_WORKERS)) as pool:
+        return merge_reports(list(pool.map(read, paths)))
+
+
+REPORT_CHUNKSIZE = 50_000
+
+
+def parse_report_chunked(csv_file, selection, chunksize=REPORT_CHUNKSIZE):
+    # Leitura em partes: mantém só as linhas dos dias e faixas de horário em
+    # selection = (datas "dd-mm-aaaa", faixas ("HH:MM", "HH:MM")), então a memória
+    # usada depende do que vai para o Excel e não do tamanho do CSV.
+    dates, ranges = selection
+    days = pd.to_datetime(list(dates), format="%d-%m-%Y")
+    minute_ranges = [
+        (int(start[:2]) * 60 + int(start[3:5]), int(end[:2]) * 60 + int(end[3:5]))
+        for start, end in ranges
+    ]
+
+    with span(
+        "parse_csv_chunked",
+        file=os.path.basename(csv_file),
+        bytes_read=os.path.getsize(csv_file),
+    ) as trace:
+        kept = []
+        date_column, usecols, counts = read_report_schema(csv_file)
+        for chunk in iter_report_chunks(csv_file, usecols, counts, chunksize):
+            times = parse_dates(chunk[date_column])
+            minutes = times.dt.hour * 60 + times.dt.minute
+
+            in_range = pd.Series(False, index=chunk.index)
+            for start, end in minute_ranges:
+                in_range |= (minutes >= start) & (minutes <= end)
+            keep = times.dt.normalize().isin(days) & in_range
+
+            chunk = chunk[keep].copy()
+            chunk[date_column] = times[keep]
+            kept.append(chunk)
+
+        if not kept:  # CSV só com cabeçalho
+            return parse_report(csv_file)
+        df = index_by_time(compact_counts(pd.concat(kept), counts), date_column)
+        trace["rows"] = len(df)
+    return df, date_column
+
+
+def report_selections(configurations):
+    # Dias e faixas de horário que cada CSV precisa fornecer nesta execução
+    selections = {}
+    for config in configurations:
+        for group_key in ["files_to_process_group_a", "files_to_process_group_b"]:
+            for report, filter_date in config[group_key]:
+                if is_csv_report(report) and filter_date != "empty":
+                    dates, ranges = selections.setdefault(
+                        report_key(report), (set(), set())
+                    )
+                    dates.add(filter_date)
+                    ranges.add((config["start_hour"], config["end_hour"]))
+    return {
+        path: (tuple(sorted(dates)), tuple(sorted(ranges)))
+        for path, (dates, ranges) in selections.items()
+    }
+
+
+def index_by_time(df, date_column):
+    # Ordena pelo horário e usa a própria coluna de data como índice, para que
+    # filter_by_date_and_time recorte as janelas por busca binária.
+    # Linhas sem data válida nunca entram em nenhuma janela e são descartadas.
+    df = df[df[date_column].notna()].sort_values(date_column, kind="stable")
+    df.index = pd.DatetimeIndex(df[date_column])
+    return df
+
+
+class ReportCache:
+    # Cache dos reports já lidos, para que cada CSV seja lido e convertido uma única vez.
+    # A chave são os caminhos do report (ver report_files) com mtime e tamanho de
+    # cada um, então um arquivo alterado no disco é relido.
+    # Com streaming=True os CSVs planejados (ver plan) são lidos em partes e só os
+    # dias/horários usados na execução ficam em memória.
+    # Com disk_cache (DiskReportCache), os reports lidos por inteiro também ficam
+    # salvos em disco e são reaproveitados entre sessões.
+
+    def __init__(self, streaming=False, chunksize=REPORT_CHUNKSIZE, disk_cache=None):
+        self.streaming = streaming
+        self.chunksize = chunksize
+        self.disk_cache = disk_cache
+        self._reports = {}
+        self._selections = {}
+        # Um lock por arquivo: a leitura em segundo plano (ao escolher o arquivo)
+        # e o processamento nunca leem o mesmo CSV duas vezes ao mesmo tempo
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def plan(self, configurations):
+        self._selections = report_selections(configurations)
+
+    def get(self, report):
+        paths = report_key(report)
+        with self._locks_guard:
+            lock = self._locks.setdefault(paths, threading.Lock())
+        with lock:
+            return self._get(paths)
+
+    def _get(self, paths):
+        stats = tuple(
+            (stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths)
+        )
+        selection = self._selections.get(paths) if self.streaming else None
+        key = (paths, stats, selection)
+
+        report = self._reports.get(key)
+        if report is None:
+            # Descarta versões antigas do mesmo report
+            for stale_key in [k for k in list(self._reports) if k[0] == paths]:
+                del self._reports[stale_key]
+            report = parse_reports(paths, lambda path: self._read(path, selection))
+            self._reports[key] = report
+        return report
+
+    def _read(self, path, selection):
+        # Um único CSV; o cache em disco é por arquivo, mesmo nos reports com vários
+        if selection is not None:
+            return parse_report_chunked(path, selection, self.chunksize)
+        report = self._load_from_disk(path)
+        if report is None:
+            report = parse_report(path)
+            self._store_on_disk(path, report)
+        return report
+
+    def _load_from_disk(self, path):
+        if self.disk_cache is None:
+            return None
+        try:
+            with span("disk_cache_load", file=os.path.basename(path)) as trace:
+                report = self.disk_cache.load(path)
+                trace["hit"] = report is not None
+            return report
+        except OSError as e:
+            logger.warning(f"Cache em disco indisponível: {e}")
+            return None
+
+    def _store_on_disk(self, path, report):
+        if self.disk_cache is None:
+            return
+        try:
+            with span("disk_cache_store", file=os.path.basename(path)):
+                self.disk_cache.store(path, report)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar o cache em disco: {e}")
+
+    def trim(self, max_reports):
+        # Mantém só os max_reports reports lidos mais recentemente (processos
+        # longos, como o ConversorService, que atendem muitos jobs)
+        for key in list(self._reports)[:-max_reports or None]:
+            self._reports.pop(key, None)
+
+    def clear(self):
+        self._reports.clear()
+        self._selections = {}
+
+
+def load_report(csv_file, cache=None):
+    if cache is None:
+        return parse_reports(csv_file)
+    return cache.get(csv_file)
+
+
+def filter_by_date_and_time(df, date_column, target_date, start_time, end_time):
+    if not pd.api.types.is_datetime64_any_dtype(df[date_column]):
+        df[date_column] = pd.to_datetime(
+            df[date_column], errors="coerce", format="%Y-%m-%d %H:%M:%S"
+        )
+
+    target_date = pd.to_datetime(target_date, format="%d-%m-%Y").date()
+    start_datetime = pd.to_datetime(f"{target_date} {start_time}")
+    end_datetime = pd.to_datetime(f"{target_date} {end_time}")
+
+    if isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing:
+        start = df.index.searchsorted(start_datetime, side="left")
+        end = df.index.searchsorted(end_datetime, side="right")
+        return df.iloc[start:end]
+
+    return df[(df[date_column] >= start_datetime) & (df[date_column] <= end_datetime)]
+
+
+nrows = 0
+
+
+def convert_to_excel(
+    csv_file,
+    output_folder,
+    filter_date,
+    start_hour,
+    end_hour,
+    date_column=None,
+    cache=None,
+):
+    global nrows
+    df, detected_date_column = load_report(csv_file, cache)
+
+    # Detecta automaticamente a coluna de data se não especificada
+    if date_column is None:
+        date_column = detected_date_column
+
+    if filter_date:
+        filtered_df = filter_by_date_and_time(
+            df, date_column, filter_date, start_hour, end_hour
+        )
+        nrows = len(filtered_df)
+
+    base_name = os.path.splitext(os.path.basename(report_files(csv_file)[0]))[0]
+    output_file = os.path.join(output_folder, f"{base_name}_{filter_date}.xlsx")
+    # Recoloca a coluna B (horaAte, não lida) para as contagens ficarem em C:P
+    filtered_df = filtered_df.reindex(
+        columns=[date_column, END_COLUMN, *count_columns(filtered_df, date_column)]
+    )
+    with span("temp_xlsx_write", file=os.path.basename(output_file)) as trace:
+        filtered_df.to_excel(output_file, index=False)
+        trace["rows"] = len(filtered_df)
+        trace["bytes_written"] = os.path.getsize(output_file)
+
+    return output_file
+
+
+def split_report(df, date_column, windows, tags=None):
+    # Recorta de uma vez todas as janelas (dia, período) pedidas de um report.
+    # windows = [(data "dd-mm-aaaa", "HH:MM", "HH:MM")], com início e fim inclusivos
+    # como no filter_by_date_and_time. Como o report está ordenado pelo horário
+    # (index_by_time), cada janela é uma faixa contígua de linhas: os limites de
+    # todas saem de um único searchsorted e as contagens são convertidas para
+    # numpy uma vez só.
+    # Devolve {janela: contagens (colunas C:P)}, uma linha por intervalo de 15
+    # minutos do início ao fim da janela (ver slot_block).
+    # Com tags ({janela: {"configuration", "group"}}), cada janela tem o seu span
+    # extract_window, para o trace separar as linhas por configuração e grupo.
+    if not (isinstance(df.index, pd.DatetimeIndex) and df.index.is_monotonic_increasing):
+        df = index_by_time(df, date_column)
+    windows = list(dict.fromkeys(windows))
+    days = pd.to_datetime([day for day, _, _ in windows], format="%d-%m-%Y")
+    starts = days + pd.to_timedelta([f"{start}:00" for _, start, _ in windows])
+    ends = days + pd.to_timedelta([f"{end}:00" for _, _, end in windows])
+    first = df.index.searchsorted(starts, side="left")
+    last = np.maximum(df.index.searchsorted(ends, side="right"), first)
+
+    # Só as linhas entre a primeira e a última janela são convertidas
+    low, high = (int(first.min()), int(last.max())) if windows else (0, 0)
+    times = df.index[low:high]
+    counts = df.iloc[low:high][count_columns(df, date_column)].to_numpy()
+    # Intervalo de 15 minutos de cada registro no seu dia
+    slots = ((times - times.normalize()) // pd.Timedelta(minutes=SLOT_MINUTES)).to_numpy()
+    blocks = {}
+    for window, start, end in zip(windows, first, last):
+        trace = span("extract_window", day=window[0], **tags[window]) if tags else NULL_SPAN
+        with trace:
+            blocks[window] = slot_block(
+                counts[start - low:end - low],
+                slots[start - low:end - low] - time_slot(window[1]),
+                time_slot(window[2]) - time_slot(window[1]) + 1,
+            )
+            trace["rows"] = len(blocks[window])
+    return blocks
+
+
+def slot_block(counts, offsets, length):
+    # Posiciona cada registro na linha do seu intervalo (offsets = intervalo do
+    # registro - intervalo do início da janela), então a linha no template é
+    # start_row + offset (ver slot_row_table). O bloco tem sempre length linhas,
+    # a janela inteira: intervalos sem registro (no meio, no fim ou a janela
+    # toda) viram linhas vazias (NaN), que limpam o que houver no workbook, em
+    # vez de puxar os registros seguintes para cima ou deixar valores antigos;
+    # com dois registros no mesmo intervalo vale o primeiro, como no merge_reports.
+    # Sem falhas nem repetições (o normal), o bloco é a própria fatia.
+    if len(offsets) == length and (offsets == np.arange(length)).all():
+        return counts
+    offsets, first = np.unique(offsets, return_index=True)
+    block = np.full((length, counts.shape[1]), np.nan)
+    block[offsets] = counts[first]
+    return block
+
+
+def extract_windows(csv_file, windows, cache=None, tags=None):
+    df, date_column = load_report(csv_file, cache)
+    return split_report(df, date_column, windows, tags)
+
+
+def extract_block(csv_file, filter_date, start_hour, end_hour, cache=None):
+    # Extrai em memória o bloco de contagens (colunas C:P) de um dia/período
+    window = (filter_date, start_hour, end_hour)
+    return extract_windows(csv_file, [window], cache)[window]
+
+
+class RunCancelled(Exception):
+    pass
+
+
+class BlocksFailed(Exception):
+    # Algum bloco não pôde ser extraído (report ilegível, sem coluna de data...).
+    # O workbook é salvo com os demais blocos; os que falharam ficam fora do
+    # checkpoint e são tentados de novo na próxima execução.
+    pass
+
+
+def check_cancelled(cancel_event):
+    # Chamado entre as etapas; como o workbook só é salvo no final, cancelar
+    # antes do save deixa o arquivo Excel intacto.
+    if cancel_event is not None and cancel_event.is_set():
+        raise RunCancelled("Processamento cancelado")
+
+
+def check_failed_blocks(errors):
+    if errors:
+        reports = sorted({report_name(report) for report, _, _ in errors})
+        raise BlocksFailed(
+            f"{len(errors)} bloco(s) não puderam ser extraídos ({', '.join(reports)}): "
+            f"{errors[0][2]}"
+        )
+
+
+def emit_progress(progress, stage, **fields):
+    # Eventos de progresso: {"stage", "configuration", "group", "day", "rows", ...}
+    if progress is not None:
+        progress({"stage": stage, **fields})
+
+
+# Número de threads da extração: os reports ficam no ReportCache (um lock por
+# report, então cada CSV é lido uma vez mesmo com várias threads pedindo) e cada
+# report é recortado de forma independente, então só a escrita no workbook é serial.
+EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def block_signature(checkpoint, config, csv_file, filter_date, day_index):
+    # O que determina o conteúdo de um bloco no workbook (ver RunCheckpoint)
+    return {
+        "inputs": checkpoint.input_hashes(report_key(csv_file)),
+        "date": filter_date,
+        "start_hour": config["start_hour"],
+        "end_hour": config["end_hour"],
+        "start_row": config["start_rows"][day_index],
+    }
+
+
+def extract_all_blocks(
+    configurations,
+    log,
+    cache=None,
+    progress=None,
+    cancel_event=None,
+    workers=EXTRACT_WORKERS,
+    checkpoint=None,
+    errors=None,
+):
+    # Extrai os blocos de todas as configurações, grupos e dias em paralelo.
+    # Devolve [(blocos A, blocos B)] na ordem das configurações, com os blocos na
+    # mesma ordem do extract_blocks, independente da ordem em que terminaram.
+    # Com checkpoint, blocos que já estão no workbook com a mesma assinatura não
+    # são extraídos e aparecem como None (process_configuration não os escreve).
+    # Blocos que falharam também aparecem como None, para não deslocar os dias
+    # seguintes; a lista errors, se houver, recebe (report, data, mensagem) de cada um.
+    tasks = []
+    skipped = 0
+    for index, config in enumerate(configurations):
+        for group, group_key in [
+            ("A", "files_to_process_group_a"),
+            ("B", "files_to_process_group_b"),
+        ]:
+            # O template só tem lugar para len(start_rows) dias; os demais não
+            # seriam gravados (process_configuration), então nem são extraídos
+            days = config[group_key][: len(config["start_rows"])]
+            for day_index, (csv_file, filter_date) in enumerate(days):
+                if not is_csv_report(csv_file):
+                    continue
+                key = signature = None
+                if checkpoint is not None and filter_date != "empty":
+                    key = f"{config['name']} / {group} / {day_index}"
+                    signature = block_signature(
+                        checkpoint, config, csv_file, filter_date, day_index
+                    )
+                    if checkpoint.is_current(key, signature):
+                        filter_date = None  # Já está no workbook
+                        skipped += 1
+                tasks.append((index, config, group, csv_file, filter_date, key, signature))
+    if skipped:
+        log(f"{skipped} bloco(s) sem alteração desde a última execução foram mantidos.")
+
+    # Todas as janelas de um mesmo report são recortadas juntas (split_report),
+    # então cada report é percorrido uma vez, não importa quantos dias e períodos;
+    # o paralelismo é entre reports. Uma janela pedida por mais de uma configuração
+    # ou grupo (o mesmo CSV nos dois grupos) fica no trace com a primeira
+    windows = {}
+    for _, config, group, csv_file, filter_date, _, _ in tasks:
+        if filter_date not in ("empty", None):
+            windows.setdefault(report_key(csv_file), {}).setdefault(
+                (filter_date, config["start_hour"], config["end_hour"]),
+                (csv_file, {"configuration": config["name"], "group": group}),
+            )
+    total = sum(1 for task in tasks if task[4] not in ("empty", None))
+    done = [0]
+    done_lock = threading.Lock()
+
+    def extract(paths, report_windows):
+        check_cancelled(cancel_event)
+        csv_file = next(iter(report_windows.values()))[0]
+        tags = {window: tag for window, (_, tag) in report_windows.items()}
+        with span(
+            "extract",
+            file=os.path.basename(paths[0]),
+            blocks=len(report_windows),
+        ) as trace:
+            blocks = extract_windows(csv_file, list(report_windows), cache=cache, tags=tags)
+            trace["rows"] = sum(len(block) for block in blocks.values())
+        return blocks
+
+    def block_done(config, group, filter_date, block, key, signature):
+        with done_lock:
+            done[0] += 1
+            emit_progress(
+                progress,
+                "extract",
+                configuration=config["name"],
+                group=group,
+                day=filter_date,
+                rows=len(block),
+                done=done[0],
+                total=total,
+            )
+        if checkpoint is not None:
+            checkpoint.commit(key, signature)
+
+    results = [([], []) for _ in configurations]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            paths: pool.submit(extract, paths, report_windows)
+            for paths, report_windows in windows.items()
+        }
+        try:
+            for index, config, group, csv_file, filter_date, key, signature in tasks:
+                data_frames = results[index][0 if group == "A" else 1]
+                if filter_date in ("empty", None):
+                    data_frames.append("" if filter_date == "empty" else None)
+                    continue
+                try:
+                    blocks = futures[report_key(csv_file)].result()
+                except RunCancelled:
+                    raise
+                except Exception as e:
+                    log(f"Error converting {csv_file}: {str(e)}")
+                    if errors is not None:
+                        errors.append((csv_file, filter_date, str(e)))
+                    data_frames.append(None)
+                    continue
+                block = blocks[(filter_date, config["start_hour"], config["end_hour"])]
+                block_done(config, group, filter_date, block, key, signature)
+                data_frames.append(block)
+        except RunCancelled:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    return results
+
+
+def extract_blocks(config, log, cache=None, progress=None, cancel_event=None):
+    return extract_all_blocks([config], log, cache, progress, cancel_event, workers=1)[0]
+
+
+def extract_blocks_via_xlsx(config, output_folder, log, cache=None):
+    # Caminho antigo: grava cada recorte em um .xlsx temporário e lê de volta.
+    # Mantido apenas para comparação com o extract_blocks.
+    temporary_files = []
+
+    for group_key in ["files_to_process_group_a", "files_to_process_group_b"]:
+        for csv_file, filter_date in config[group_key]:
+            if is_csv_report(csv_file):
+                if filter_date == "empty":
+                    temporary_files.append((group_key, "empty"))
+                else:
+                    try:
+                        xlsx_file = convert_to_excel(
+                            csv_file,
+                            output_folder,
+                            filter_date,
+                            config["start_hour"],
+                            config["end_hour"],
+                            cache=cache,
+                        )
+                        temporary_files.append((group_key, xlsx_file))
+                    except Exception as e:
+                        log(f"Error converting {csv_file}: {str(e)}")
+
+    data_frames_a = []
+    data_frames_b = []
+
+    for group_key, xlsx_file in temporary_files:
+        if group_key == "files_to_process_group_a":
+            if xlsx_file == "empty":
+                data_frames_a.append("")
+                continue
+            for csv, _ in config["files_to_process_group_a"]:
+                name_mov_a = os.path.basename(report_files(csv)[0]).split(".")[0]
+                if name_mov_a in xlsx_file:
+                    with span(
+                        "temp_xlsx_read",
+                        configuration=config["name"],
+                        group="A",
+                        bytes_read=os.path.getsize(xlsx_file),
+                    ):
+                        df = pd.read_excel(
+                            xlsx_file,
+                            usecols="C:P",
+                            sheet_name="Sheet1",
+                            skiprows=1,
+                            nrows=nrows,
+                            engine="openpyxl",
+                            header=None,
+                        )
+                    data_frames_a.append(df)
+                    break
+        elif group_key == "files_to_process_group_b":
+            if xlsx_file == "empty":
+                data_frames_b.append("")
+                continue
+            for csv, _ in config["files_to_process_group_b"]:
+                name_mov_b = os.path.basename(report_files(csv)[0]).split(".")[0]
+                if name_mov_b in xlsx_file:
+                    with span(
+                        "temp_xlsx_read",
+                        configuration=config["name"],
+                        group="B",
+                        bytes_read=os.path.getsize(xlsx_file),
+                    ):
+                        df = pd.read_excel(
+                            xlsx_file,
+                            usecols="C:P",
+                            sheet_name="Sheet1",
+                            skiprows=1,
+                            nrows=nrows,
+                            engine="openpyxl",
+                            header=None,
+                        )
+                    data_frames_b.append(df)
+                    break
+
+    # Ensure files are deleted only once
+    unique_temp_files = set(file for _, file in temporary_files)
+    for temp_file in unique_temp_files:
+        if temp_file == "empty":
+            continue
+        try:
+            os.remove(temp_file)
+            logger.debug(f"Deleted temporary file: {temp_file}")
+        except FileNotFoundError:
+            logger.debug(f"Temporary file already deleted: {temp_file}")
+        except Exception as e:
+            logger.warning(f"Error deleting temporary file {temp_file}: {str(e)}")
+
+    return data_frames_a, data_frames_b
+
+
+def get_sheet(book, sheet_name):
+    if sheet_name in book.sheetnames:
+        return book[sheet_name]
+    return book.create_sheet(sheet_name)
+
+
+def set_cell(ws, row, column, value):
+    # Só grava se o valor for diferente do que já está na célula; devolve 1 se mudou.
+    # None não altera a célula (mesmo comportamento do ws.cell do openpyxl)
+    if value is None:
+        return 0
+    cell = ws.cell(row=row, column=column)
+    if cell.value == value:
+        return 0
+    cell.value = value
+    return 1
+
+
+def clear_cell(ws, row, column):
+    # Esvazia a célula se ela tiver valor; devolve 1 se mudou
+    cell = ws.cell(row=row, column=column)
+    if cell.value is None:
+        return 0
+    cell.value = None
+    return 1
+
+
+def write_blocks(ws, blocks, startcol=3, label_col=22):
+    # Escreve os blocos de contagem direto nas células da planilha, sem passar
+    # por DataFrame.to_excel. Cada bloco é (startrow, valores, rótulo do período);
+    # startrow/startcol seguem a convenção 0-based do to_excel.
+    # Devolve quantas células mudaram.
+    changed = 0
+    for start_row, values, label in blocks:
+        rows = np.asarray(values).tolist()
+        for r, row in enumerate(rows, start=start_row + 1):
+            for c, value in enumerate(row, start=startcol + 1):
+                if value != value:  # NaN (ou intervalo sem registro) vira célula vazia
+                    changed += clear_cell(ws, r, c)
+                else:
+                    changed += set_cell(ws, r, c, value)
+            changed += set_cell(ws, r, label_col + 1, label)  # Coluna do período
+    return changed
+
+
+# Planilhas e células do template que o processamento grava. Os blocos das
+# contagens começam na linha 17 (colunas D:Q e o rótulo na W), um dia a cada
+# 103 linhas; os títulos ficam em B20, B23 e C21:D22.
+TARGET_SHEETS = ["Contagens A (EXCLUIR)", "Contagens B (EXCLUIR)", "Títulos"]
+TARGET_RANGES = {
+    "Contagens A (EXCLUIR)": ["D17:Q730", "W17:W730"],
+    "Contagens B (EXCLUIR)": ["D17:Q730", "W17:W730"],
+    "Títulos": ["B20", "B23", "C21:D22"],
+}
+
+
+def validate_target_workbook(book):
+    # Devolve a lista de problemas do template (vazia se estiver tudo certo)
+    problems = []
+    for sheet_name in TARGET_SHEETS:
+        if sheet_name not in book.sheetnames:
+            problems.append(f"planilha '{sheet_name}' não encontrada")
+            continue
+        ws = book[sheet_name]
+        if not hasattr(ws, "merged_cells"):
+            problems.append(f"'{sheet_name}' não é uma planilha de dados")
+            continue
+        # Células mescladas dentro das áreas gravadas não aceitam valor
+        for area in TARGET_RANGES[sheet_name]:
+            target = CellRange(area)
+            for merged in ws.merged_cells.ranges:
+                if not merged.isdisjoint(target):
+                    problems.append(
+                        f"'{sheet_name}' tem células mescladas ({merged.coord}) em {area}"
+                    )
+    return problems
+
+
+def load_target_workbook(excel_target, direct=True):
+    # Lê e valida o template; erros aparecem aqui, antes de qualquer leitura de CSV.
+    # direct=True usa o XlsxWorkbook (só as planilhas alteradas são regravadas);
+    # direct=False carrega o workbook inteiro com openpyxl.
+    with span("workbook_load", bytes_read=os.path.getsize(excel_target), direct=direct):
+        book = XlsxWorkbook(excel_target) if direct else load_workbook(excel_target)
+    problems = validate_target_workbook(book)
+    if problems:
+        raise ValueError(
+            f"Template inválido ({os.path.basename(excel_target)}): " + "; ".join(problems)
+        )
+    return book
+
+
+class TargetWorkbook:
+    # Workbook de destino (XlsxWorkbook ou openpyxl); o arquivo só é gravado no save()
+    def __init__(self, path, book):
+        self.path = path
+        self.book = book
+
+    def save(self):
+        self.book.save(self.path)
+
+
+class TemplateCache:
+    # Guarda o template já carregado e validado (ver preload), para que o
+    # processamento não precise abrir o workbook de novo. Vale enquanto o arquivo
+    # não mudar (caminho, mtime e tamanho) e é usado por uma única execução: o
+    # processamento altera o workbook em memória.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None
+
+    def _signature(self, excel_target, direct):
+        stat = os.stat(excel_target)
+        return (os.path.abspath(excel_target), stat.st_mtime_ns, stat.st_size, direct)
+
+    def preload(self, excel_target, direct=True):
+        with self._lock:
+            self._entry = None
+            signature = self._signature(excel_target, direct)
+            book = load_target_workbook(excel_target, direct)
+            self._entry = (signature, book)
+
+    def take(self, excel_target, direct=True):
+        # Devolve o workbook pré-carregado ou None se não houver ou estiver velho
+        with self._lock:
+            entry, self._entry = self._entry, None
+        if entry is None:
+            return None
+        try:
+            signature = self._signature(excel_target, direct)
+        except OSError:
+            return None
+        return entry[1] if entry[0] == signature else None
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+
+def open_target_workbook(excel_target, templates=None, direct=True):
+    # Carrega o template uma única vez; o arquivo só é gravado no save_target_workbook
+    book = templates.take(excel_target, direct) if templates is not None else None
+    if book is None:
+        book = load_target_workbook(excel_target, direct)
+    else:
+        logger.debug("Usando o template pré-carregado de %s", excel_target)
+    return TargetWorkbook(excel_target, book)
+
+
+def save_target_workbook(writer, excel_target):
+    with span("workbook_save") as trace:
+        writer.save()
+        trace["bytes_written"] = os.path.getsize(excel_target)
+
+
+def process_configuration(
+    config,
+    output_folder,
+    log,
+    file_names=None,
+    cache=None,
+    legacy_xlsx=False,
+    writer=None,
+    progress=None,
+    cancel_event=None,
+    blocks=None,
+):
+    # Sem writer compartilhado, a configuração abre e salva o workbook sozinha.
+    # blocks são os blocos já extraídos (ver extract_all_blocks).
+    # Devolve quantas células do workbook mudaram.
+    own_writer = writer is None
+    if own_writer:
+        writer = open_target_workbook(config["excel_target"])
+
+    if blocks is not None:
+        data_frames_a, data_frames_b = blocks
+    elif legacy_xlsx:
+        data_frames_a, data_frames_b = extract_blocks_via_xlsx(
+            config, output_folder, log, cache
+        )
+    else:
+        data_frames_a, data_frames_b = extract_blocks(
+            config, log, cache, progress=progress, cancel_event=cancel_event
+        )
+    check_cancelled(cancel_event)
+
+    log("Transferindo dados para Excel...")
+    changed = 0
+
+    periodo = "Diurno" if config["name"] == "Período Diurno" else "Noturno"
+    for group, sheet_name, data_frames in [
+        ("A", "Contagens A (EXCLUIR)", data_frames_a),
+        ("B", "Contagens B (EXCLUIR)", data_frames_b),
+    ]:
+        blocks = [
+            (start_row, df, periodo)
+            for df, start_row, day_control in zip(
+                data_frames, config["start_rows"], config["days_controls"]
+            )
+            # Apenas processa se o checkbox estiver marcado; None = já está no workbook
+            if day_control["boolean"] and df is not None
+        ]
+        with span(
+            "write_blocks", configuration=config["name"], group=group
+        ) as trace:
+            cells = write_blocks(get_sheet(writer.book, sheet_name), blocks)
+            trace["rows"] = sum(len(df) for _, df, _ in blocks)
+            trace["cells_changed"] = cells
+        changed += cells
+        emit_progress(
+            progress,
+            "write",
+            configuration=config["name"],
+            group=group,
+            rows=sum(len(df) for _, df, _ in blocks),
+            cells=cells,
+        )
+
+    data_value = title_date(config["days_controls"])
+    date_object = datetime.strptime(data_value, "%d-%m-%Y")
+    formatted_date = date_object.strftime("%d/%m/%Y")
+    titulos = get_sheet(writer.book, "Títulos")
+    changed += set_cell(titulos, 23, 2, formatted_date)
+
+    file_name = os.path.splitext(os.path.basename(config["excel_target"]))[0]
+    changed += set_cell(titulos, 20, 2, file_name)
+
+    # Escrever os nomes dos arquivos nas células específicas:
+    # C21/C22 - button_day_a/b, D21/D22 - button_evening_a/b
+    if file_names:
+        for key, row, column in [
+            ("day_a", 21, 3),
+            ("day_b", 22, 3),
+            ("evening_a", 21, 4),
+            ("evening_b", 22, 4),
+        ]:
+            if file_names.get(key):
+                changed += set_cell(titulos, row, column, file_names[key])
+
+    if own_writer and changed:
+        save_target_workbook(writer, config["excel_target"])
+    return changed
+
+
+def move_to_old_folder(path, old_folder):
+    # Move um arquivo para a pasta old sem sobrescrever nada: se já existir um
+    # arquivo com o mesmo nome, o novo ganha um sufixo com data e hora. Na mesma
+    # unidade é um rename (atômico); entre unidades, copia para um temporário na
+    # pasta old, renomeia e só então apaga o original.
+    os.makedirs(old_folder, exist_ok=True)
+    name, extension = os.path.splitext(os.path.basename(path))
+    destination = os.path.join(old_folder, name + extension)
+    if os.path.exists(destination):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        destination = os.path.join(old_folder, f"{name}-{stamp}{extension}")
+    try:
+        os.rename(path, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        tmp = destination + ".tmp"
+        shutil.copy2(path, tmp)
+        os.replace(tmp, destination)
+        os.remove(path)
+    logger.info(f"Movido para 'old': {path}")
+    return destination
+
+
+def move_files_to_old_folder(configurations, old_folder):
+    # Arquivos usados nas configurações e o destino de cada um na pasta old.
+    # A interface só calcula os destinos, os arquivos ficam onde estão; quem move
+    # de fato é o move_to_old_folder (usado pelo modo watch, ver ConversorWatch).
+    processed_files = set()  # Para rastrear arquivos únicos
+    destinations = []
+
+    for config in configurations:
+        for group_key in ["files_to_process_group_a", "files_to_process_group_b"]:
+            if group_key in config:  # Garante que a chave exista no dicionário
+                for report, _ in config[group_key]:
+                    for csv_file in report_files(report):
+                        if csv_file not in processed_files:
+                            processed_files.add(csv_file)
+                            destination = os.path.join(
+                                old_folder, os.path.basename(csv_file)
+                            )
+                            destinations.append((csv_file, destination))
+    return destinations
+
+
+def findalldays_chunked(csv_path, chunksize=REPORT_CHUNKSIZE):
+    # Mesmo resultado do findalldays, lendo o(s) CSV(s) em partes sem guardar as linhas
+    dias = set()
+    for path in report_files(csv_path):
+        date_column, usecols, counts = read_report_schema(path)
+        for chunk in iter_report_chunks(path, usecols, counts, chunksize):
+            times = parse_dates(chunk[date_column])
+            com_contagem = (chunk[counts] > 0).any(axis=1)
+            dias.update(times[com_contagem].dropna().dt.date)
+
+    return [{"boolean": True, "data": data.strftime("%d-%m-%Y")} for data in sorted(dias)]
+
+
+def findalldays(csv_path, cache=None):
+    if cache is not None and cache.streaming:
+        return findalldays_chunked(csv_path, cache.chunksize)
+
+    # A coluna de data já vem convertida para datetime pelo load_report
+    df, date_column = load_report(csv_path, cache)
+
+    # Uma única redução sobre a matriz de contagens: linhas com alguma contagem > 0,
+    # depois os dias distintos dessas linhas (o índice já está ordenado)
+    com_contagem = (df[count_columns(df, date_column)].to_numpy() > 0).any(axis=1)
+    dias = df.index[com_contagem].normalize().unique()
+
+    return [{"boolean": True, "data": data.strftime("%d-%m-%Y")} for data in dias]
+
+
+def title_date(days_controls):
+    # Data dos Títulos: a do primeiro dia que tem data. Na interface todo dia tem
+    # data, marcado ou não; nos jobs, um dia desmarcado (None/"empty") não tem
+    return next(day["data"] for day in days_controls if day["data"])
+
+
+def generate_date_range(days_controls):
+    valid_dates = []
+
+    logger.debug("📋 Iniciando generate_date_range")
+    logger.debug(f"🔢 Total de dias recebidos: {len(days_controls)}")
+    logger.debug(f"🎯 days_controls: {days_controls}")
+
+    for i, day in enumerate(days_controls):
+        if day["boolean"]:
+            valid_dates.append(day["data"])
+            logger.debug(
+                f"✅ Checkbox DIA {i+1} marcado → usando data existente: {day['data']}"
+            )
+        else:
+            valid_dates.append("empty")
+            logger.debug(f"❎ Checkbox DIA {i+1} desmarcado → adicionando: 'empty'")
+
+    logger.debug(f"\n📤 Lista final de datas válidas: {valid_dates}")
+    return valid_dates
+
+
+REPORT_KEYS = ["report_daytime_a", "report_daytime_b", "report_evening_a", "report_evening_b"]
+
+
+def build_configurations(excel_target, reports, days_controls, start_diurno, end_diurno):
+    # start_diurno/end_diurno são os horários mostrados nos botões do período DIURNO.
+    # A madrugada termina 15 minutos antes do início do diurno, e o diurno termina
+    # 15 minutos antes do início do noturno.
+    end_time_madrugada = (
+        datetime.strptime(start_diurno, "%H:%M") - timedelta(minutes=15)
+    ).strftime("%H:%M")
+    end_time = (
+        datetime.strptime(end_diurno, "%H:%M") - timedelta(minutes=15)
+    ).strftime("%H:%M")
+    start_time_night = end_diurno
+
+    dates_to_process = generate_date_range(days_controls)
+
+    def files(report_key):
+        return [(reports.get(report_key, ""), date) for date in dates_to_process]
+
+    return [
+        {
+            "name": "Madrugada",
+            "start_hour": "00:00",
+            "end_hour": end_time_madrugada,
+            "days_process": len(days_controls),
+            "excel_target": excel_target,
+            "start_rows": calculate_start_row_array("00:00"),
+            "days_controls": days_controls,
+            "move_files": False,
+            "files_to_process_group_a": files("report_evening_a"),
+            "files_to_process_group_b": files("report_evening_b"),
+        },
+        {
+            "name": "Período Diurno",
+            "start_hour": start_diurno,
+            "end_hour": end_time,
+            "days_process": len(days_controls),
+            "excel_target": excel_target,
+            "start_rows": calculate_start_row_array(start_diurno),
+            "days_controls": days_controls,
+            "move_files": True,
+            "files_to_process_group_a": files("report_daytime_a"),
+            "files_to_process_group_b": files("report_daytime_b"),
+        },
+        {
+            "name": "Período Noturno",
+            "start_hour": start_time_night,
+            "end_hour": "23:45",
+            "days_process": len(days_controls),
+            "excel_target": excel_target,
+            "start_rows": calculate_start_row_array(start_time_night),
+            "days_controls": days_controls,
+            "move_files": True,
+            "files_to_process_group_a": files("report_evening_a"),
+            "files_to_process_group_b": files("report_evening_b"),
+        },
+    ]
+
+
+def normalize_days(days):
+    # Aceita tanto a lista de days_controls da interface quanto uma lista simples
+    # de datas "dd-mm-aaaa", onde None/"empty" marca um dia desmarcado.
+    days_controls = []
+    for day in days:
+        if isinstance(day, dict):
+            days_controls.append({"boolean": bool(day["boolean"]), "data": day["data"]})
+        elif day in (None, "", "empty"):
+            days_controls.append({"boolean": False, "data": ""})
+        else:
+            datetime.strptime(day, "%d-%m-%Y")  # Valida o formato
+            days_controls.append({"boolean": True, "data": day})
+    return days_controls
+
+
+def run_job(
+    job, log=print, cache=None, progress=None, cancel_event=None, templates=None
+):
+    # Executa um processamento completo (as três configurações) sobre um template.
+    # job é um dicionário com excel_target, os reports (REPORT_KEYS, cada um um CSV
+    # ou uma lista de CSVs), start_diurno, end_diurno e opcionalmente days,
+    # file_names, output_folder, streaming (leitura dos CSVs em partes), disk_cache (padrão True, ver ReportCache) e
+    # direct_xlsx (padrão True, ver load_target_workbook) e resume (padrão True:
+    # pula os blocos que já estão no workbook, ver RunCheckpoint).
+    # progress recebe os eventos de emit_progress; cancel_event (threading.Event)
+    # interrompe o processamento com RunCancelled antes de salvar o workbook.
+    # Se algum bloco não puder ser extraído, os demais são gravados e o run_job
+    # termina com BlocksFailed.
+    # templates (TemplateCache) fornece o template já carregado, se houver.
+    if cache is None:
+        cache = ReportCache(
+            streaming=job.get("streaming", False),
+            disk_cache=DiskReportCache() if job.get("disk_cache", True) else None,
+        )
+
+    excel_target = job["excel_target"]
+    reports = {key: job.get(key) or "" for key in REPORT_KEYS}
+    if not any(reports.values()):
+        raise ValueError("Nenhum report foi selecionado")
+    missing = [
+        path
+        for report in reports.values()
+        for path in report_files(report)
+        if not os.path.exists(path)
+    ]
+    if missing:
+        raise FileNotFoundError(f"Reports não encontrados: {missing}")
+
+    # O template é aberto e validado antes dos CSVs, para falhar cedo. O workbook
+    # fica aberto durante todas as configurações e é salvo uma vez
+    emit_progress(progress, "load")
+    writer = open_target_workbook(
+        excel_target, templates, direct=job.get("direct_xlsx", True)
+    )
+
+    if job.get("days"):
+        days_controls = normalize_days(job["days"])
+    else:
+        # Sem lista de dias, usa os dias com contagem do primeiro report informado
+        days_controls = findalldays(next(r for r in reports.values() if r), cache)
+    # Verificado antes de ler os CSVs
+    if not any(day["boolean"] for day in days_controls):
+        raise ValueError("Nenhum dia foi selecionado")
+
+    file_names = job.get("file_names") or {
+        key.replace("report_", "").replace("daytime", "day"): report_name(report) or None
+        for key, report in reports.items()
+    }
+    output_folder = job.get("output_folder") or os.path.dirname(
+        os.path.abspath(excel_target)
+    )
+
+    configurations = build_configurations(
+        excel_target,
+        reports,
+        days_controls,
+        job.get("start_diurno", "06:00"),
+        job.get("end_diurno", "18:00"),
+    )
+
+    cache.plan(configurations)
+
+    checkpoint = RunCheckpoint(excel_target) if job.get("resume", True) else None
+    titles = {"date": title_date(days_controls), "file_names": file_names}
+
+    # Todos os blocos são extraídos em paralelo; só a escrita fica serial
+    # Blocos que falham não interrompem os outros; o run_job termina com
+    # BlocksFailed depois de salvar o que deu certo
+    log("Extraindo os dados dos reports...")
+    errors = []
+    with span("extract_all"):
+        blocks = extract_all_blocks(
+            configurations,
+            log,
+            cache,
+            progress=progress,
+            cancel_event=cancel_event,
+            checkpoint=checkpoint,
+            errors=errors,
+        )
+
+    changed = any(
+        df is not None and not isinstance(df, str)
+        for group_blocks in blocks
+        for data_frames in group_blocks
+        for df in data_frames
+    )
+    if checkpoint is not None and not changed and checkpoint.titles == titles:
+        check_failed_blocks(errors)
+        log("O arquivo Excel já está atualizado; nada foi alterado.")
+        emit_progress(progress, "done")
+        return configurations
+
+    changed_cells = 0
+    for index, config in enumerate(configurations):
+        check_cancelled(cancel_event)
+        log(f"Iniciando o processamento de {config['name']}...")
+        emit_progress(
+            progress,
+            "configuration",
+            configuration=config["name"],
+            index=index,
+            total=len(configurations),
+        )
+        with span("process_configuration", configuration=config["name"]):
+            changed_cells += process_configuration(
+                config,
+                output_folder,
+                log,
+                file_names,
+                cache=cache,
+                writer=writer,
+                progress=progress,
+                cancel_event=cancel_event,
+                blocks=blocks[index],
+            )
+        log(f"Processamento de {config['name']} concluído com sucesso.")
+
+    check_cancelled(cancel_event)
+    log(f"{changed_cells} célula(s) alterada(s).")
+    if changed_cells:
+        log("Salvando o arquivo Excel...")
+        emit_progress(progress, "save")
+        save_target_workbook(writer, excel_target)
+    else:
+        log("Nenhum valor mudou; o arquivo Excel não foi salvo.")
+    # O workbook no disco corresponde aos blocos extraídos, salvo ou não
+    if checkpoint is not None:
+        checkpoint.save(titles)
+    check_failed_blocks(errors)
+    emit_progress(progress, "done")
+
+    return configurations
@@ -1,306 +1,111 @@
 import flet as ft
+import logging
 import os
 import time
+from collections import deque
 from datetime import datetime, timedelta
-import pandas as pd
-from openpyxl import load_workbook
+from logging.handlers import RotatingFileHandler
 import re
-
-
-def calculate_start_row_array(
-    selected_time, start_row_base=16, interval_minutes=15, increment=103, num_values=7
-):
-    base_time = datetime.strptime("00:00", "%H:%M")
-    selected_time = datetime.strptime(selected_time, "%H:%M")
-    difference_minutes = (selected_time - base_time).seconds // 60
-
-    relative_row = difference_minutes // interval_minutes
-    start_row = start_row_base + relative_row
-
-    start_row_array = [start_row + i * increment for i in range(num_values)]
-    return start_row_array
-
-
-def filter_by_date_and_time(df, date_column, target_date, start_time, end_time):
-    df[date_column] = pd.to_datetime(
-        df[date_column], errors="coerce", format="%Y-%m-%d %H:%M:%S"
-    )
-
-    target_date = pd.to_datetime(target_date, format="%d-%m-%Y").date()
-    start_datetime = pd.to_datetime(f"{target_date} {start_time}")
-    end_datetime = pd.to_datetime(f"{target_date} {end_time}")
-
-    return df[(df[date_column] >= start_datetime) & (df[date_column] <= end_datetime)]
-
-
-nrows = 0
-
-
-def convert_to_excel(
-    csv_file, output_folder, filter_date, start_hour, end_hour, date_column=None
-):
-    global nrows
-    df = pd.read_csv(csv_file)
-    
-    # Detecta automaticamente a coluna de data se não especificada
-    if date_column is None:
-        possible_date_columns = ["horaDas", "Hora_Das", "hora_das", "HoraDas"]
-        date_column = None
-        for col in possible_date_columns:
-            if col in df.columns:
-                date_column = col
-                break
-        
-        if date_column is None:
-            raise ValueError(f"Nenhuma coluna de data encontrada. Colunas disponíveis: {list(df.columns)}")
-    
-    if filter_date:
-        filtered_df = filter_by_date_and_time(
-            df, date_column, filter_date, start_hour, end_hour
+import threading
+
+from ConversorReports import report_name
+
+logger = logging.getLogger("conversor")
+
+LOG_HEADER = "Informacões seram geradas aqui...\n"
+
+# Com esta variável apontando para um arquivo (ver benchmarks/startup.py), o
+# programa registra nele quando a janela foi desenhada e quando o processamento
+# ficou pronto, e fecha em seguida
+STARTUP_PROBE_ENV = "CONVERSOR_STARTUP_PROBE"
+
+
+def record_startup(event):
+    path = os.environ.get(STARTUP_PROBE_ENV)
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{event} {time.time()}\n")
+
+
+class UiLogSink(logging.Handler):
+    # Acumula as mensagens e atualiza o campo de log da interface no máximo uma vez
+    # a cada flush_interval segundos, mostrando apenas as últimas max_lines linhas.
+    # O log completo fica no arquivo (ver setup_logging).
+
+    def __init__(self, page, output, flush_interval=0.25, max_lines=200):
+        super().__init__(level=logging.INFO)
+        self.page = page
+        self.output = output
+        self.flush_interval = flush_interval
+        self.lines = deque(maxlen=max_lines)
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            self.lines.append(self.format(record))
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._timer = None
+            self.output.value = LOG_HEADER + "".join(f"{line}\n" for line in self.lines)
+        self.page.update()
+
+    def clear(self):
+        with self._lock:
+            self.lines.clear()
+            self.output.value = LOG_HEADER
+
+
+def setup_logging(log_folder):
+    # Log completo (inclusive mensagens de depuração) em arquivo rotativo
+    logger.setLevel(logging.DEBUG)
+    if not any(isinstance(h, RotatingFileHandler) for h in logger.handlers):
+        os.makedirs(log_folder, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            os.path.join(log_folder, "conversor.log"),
+            maxBytes=1024 * 1024,
+            backupCount=5,
+            encoding="utf-8",
         )
-        nrows = len(filtered_df)
-
-    base_name = os.path.splitext(os.path.basename(csv_file))[0]
-    output_file = os.path.join(output_folder, f"{base_name}_{filter_date}.xlsx")
-    filtered_df.to_excel(output_file, index=False)
-
-    return output_file
-
-
-def process_configuration(config, output_folder, log, file_names=None):
-    global nrows
-    writer = pd.ExcelWriter(
-        path=config["excel_target"],
-        engine="openpyxl",
-        mode="a",
-        if_sheet_exists="overlay",
-    )
-    temporary_files = []
-
-    for group_key in ["files_to_process_group_a", "files_to_process_group_b"]:
-        for csv_file, filter_date in config[group_key]:
-            if csv_file.endswith(".csv"):
-                if filter_date == "empty":
-                    temporary_files.append((group_key, "empty"))
-                else:
-                    try:
-                        xlsx_file = convert_to_excel(
-                            csv_file,
-                            output_folder,
-                            filter_date,
-                            config["start_hour"],
-                            config["end_hour"],
-                        )
-                        temporary_files.append((group_key, xlsx_file))
-                    except Exception as e:
-                        log(f"Error converting {csv_file}: {str(e)}")
-
-    log("Transferindo dados para Excel...")
-
-    data_frames_a = []
-    data_frames_b = []
-
-    for group_key, xlsx_file in temporary_files:
-        if group_key == "files_to_process_group_a":
-            if xlsx_file == "empty":
-                data_frames_a.append("")
-                continue
-            for csv, _ in config["files_to_process_group_a"]:
-                name_mov_a = os.path.basename(csv).split(".")[0]
-                if name_mov_a in xlsx_file:
-                    df = pd.read_excel(
-                        xlsx_file,
-                        usecols="C:P",
-                        sheet_name="Sheet1",
-                        skiprows=1,
-                        nrows=nrows,
-                        engine="openpyxl",      
-                        header=None,
-                    )
-                    data_frames_a.append(df)
-                    break
-        elif group_key == "files_to_process_group_b":
-            if xlsx_file == "empty":
-                data_frames_b.append("")
-                continue
-            for csv, _ in config["files_to_process_group_b"]:
-                name_mov_b = os.path.basename(csv).split(".")[0]
-                if name_mov_b in xlsx_file:
-                    df = pd.read_excel(
-                        xlsx_file,
-                        usecols="C:P",
-                        sheet_name="Sheet1",
-                        skiprows=1,
-                        nrows=nrows,
-                        engine="openpyxl",
-                        header=None,
-                    )
-                    data_frames_b.append(df)
-                    break
-
-    for df, start_row, day_control in zip(
-        data_frames_a, config["start_rows"], config["days_controls"]
-    ):
-        if day_control["boolean"]:
-            periodo = "Diurno" if config["name"] == "Período Diurno" else "Noturno"
-
-            df.to_excel(
-                writer,
-                sheet_name="Contagens A (EXCLUIR)",
-                startrow=start_row,
-                startcol=3,  # Dados começam na coluna 4
-                header=False,
-                index=False,
-            )
-
-            pd.DataFrame([periodo]* len(df)).to_excel(
-                writer,
-                sheet_name="Contagens A (EXCLUIR)",
-                startrow=start_row,
-                startcol=22,  # Coluna AK
-                header=False,
-                index=False,
-            )
-
-    for df, start_row, day_control in zip(
-        data_frames_b, config["start_rows"], config["days_controls"]
-    ):
-        if day_control["boolean"]:  # Apenas processa se o checkbox estiver marcado
-            periodo = "Diurno" if config["name"] == "Período Diurno" else "Noturno"
-
-            df.to_excel(
-                writer,
-                sheet_name="Contagens B (EXCLUIR)",
-                startrow=start_row,
-                startcol=3,
-                header=False,
-                index=False,
-            )
-            
-            pd.DataFrame([periodo]* len(df)).to_excel(
-                writer,
-                sheet_name="Contagens B (EXCLUIR)",
-                startrow=start_row,
-                startcol=22,  # Coluna AK
-                header=False,
-                index=False,
-            )
-
-    data_value = config["days_controls"][0]["data"]
-    date_object = datetime.strptime(data_value, "%d-%m-%Y")
-    formatted_date = date_object.strftime("%d/%m/%Y")
-    df = pd.DataFrame([[formatted_date]], columns=["Data"])
-    df.to_excel(
-        writer, sheet_name="Títulos", startrow=22, startcol=1, header=False, index=False
-    )
-
-    file_name = os.path.splitext(os.path.basename(config["excel_target"]))[0]
-    df_file_name = pd.DataFrame([[file_name]], columns=["Arquivo"])
-    df_file_name.to_excel(
-        writer, sheet_name="Títulos", startrow=19, startcol=1, header=False, index=False
-    )
-
-    # Escrever os nomes dos arquivos nas células específicas
-    if file_names:
-        # Coluna C (startcol=2) linha 21 (startrow=20) - button_day_a
-        if file_names.get('day_a'):
-            df_day_a = pd.DataFrame([[file_names['day_a']]], columns=["Day_A"])
-            df_day_a.to_excel(
-                writer, sheet_name="Títulos", startrow=20, startcol=2, header=False, index=False
-            )
-        
-        # Coluna C (startcol=2) linha 22 (startrow=21) - button_day_b
-        if file_names.get('day_b'):
-            df_day_b = pd.DataFrame([[file_names['day_b']]], columns=["Day_B"])
-            df_day_b.to_excel(
-                writer, sheet_name="Títulos", startrow=21, startcol=2, header=False, index=False
-            )
-        
-        # Coluna D (startcol=3) linha 21 (startrow=20) - button_evening_a
-        if file_names.get('evening_a'):
-            df_evening_a = pd.DataFrame([[file_names['evening_a']]], columns=["Evening_A"])
-            df_evening_a.to_excel(
-                writer, sheet_name="Títulos", startrow=20, startcol=3, header=False, index=False
-            )
-        
-        # Coluna D (startcol=3) linha 22 (startrow=21) - button_evening_b
-        if file_names.get('evening_b'):
-            df_evening_b = pd.DataFrame([[file_names['evening_b']]], columns=["Evening_B"])
-            df_evening_b.to_excel(
-                writer, sheet_name="Títulos", startrow=21, startcol=3, header=False, index=False
-            )
-
-    writer.close()
-
-    # Ensure files are deleted only once
-    unique_temp_files = set(file for _, file in temporary_files)
-    for temp_file in unique_temp_files:
-        if temp_file == "empty":
-            continue
-        try:
-            os.remove(temp_file)
-            print(f"Deleted temporary file: {temp_file}")
-        except FileNotFoundError:
-            print(f"Temporary file already deleted: {temp_file}")
-        except Exception as e:
-            print(f"Error deleting temporary file {temp_file}: {str(e)}")
-
-
-def move_files_to_old_folder(configurations, old_folder):
-    processed_files = set()  # Para rastrear arquivos únicos
-
-    for config in configurations:
-        for group_key in ["files_to_process_group_a", "files_to_process_group_b"]:
-            if group_key in config:  # Garante que a chave exista no dicionário
-                for csv_file, _ in config[group_key]:
-                    if (
-                        csv_file not in processed_files
-                    ):  # Verifica se o arquivo já foi processado
-                        processed_files.add(csv_file)  # Adiciona o arquivo ao conjunto
-                        destination = os.path.join(
-                            old_folder, os.path.basename(csv_file)
-                        )
-                        # try:
-                        #     if os.path.exists(destination):
-                        #          os.remove(destination)
-                        #     shutil.move(csv_file, old_folder)
-                        #     print(f"Moved file to 'old': {csv_file}")
-                        # except Exception as e:
-                        #     print(f"Error moving {csv_file}: {str(e)}")
-
-
-def findalldays(csv_path):
-    df = pd.read_csv(csv_path)
-
-    # Detecta automaticamente a coluna de data
-    possible_date_columns = ["horaDas", "Hora_Das", "hora_das", "HoraDas"]
-    date_column = None
-    for col in possible_date_columns:
-        if col in df.columns:
-            date_column = col
-            break
-    
-    if date_column is None:
-        raise ValueError(f"Nenhuma coluna de data encontrada. Colunas disponíveis: {list(df.columns)}")
-
-    # Converte a coluna de data para datetime e extrai apenas a data
-    df[date_column] = pd.to_datetime(df[date_column], errors="coerce")
-    df["data"] = df[date_column].dt.date
-
-    # Pega apenas as colunas numéricas que representam contagens
-    colunas_contagem = [
-        col
-        for col in df.columns
-        if col not in [date_column, "horaAte", "data"]
-        and df[col].dtype in ["int64", "float64"]
-    ]
-
-    dias_validos = []
-    for data, grupo in df.groupby("data"):
-        if (grupo[colunas_contagem] > 0).any().any():
-            dias_validos.append({"boolean": True, "data": data.strftime("%d-%m-%Y")})
-
-    return dias_validos
+        file_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+        )
+        logger.addHandler(file_handler)
+
+
+class Engine:
+    # Módulos e caches do processamento. O ConversorCore (pandas, numpy, openpyxl)
+    # só é importado aqui, para a janela aparecer sem esperar por ele: o main
+    # chama load em segundo plano logo depois de desenhar a interface, e quem
+    # precisar antes disso espera o carregamento terminar.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.core = None
+
+    def load(self):
+        with self._lock:
+            if self.core is None:
+                import ConversorCore
+                from ConversorCache import DiskReportCache
+                from ConversorService import SERVICE_ENV, ServiceClient
+
+                # Reports lidos na seleção são reaproveitados no processamento e,
+                # pelo cache em disco, nas próximas vezes que o mesmo arquivo for aberto
+                self.report_cache = ConversorCore.ReportCache(disk_cache=DiskReportCache())
+                # Template aberto e validado em segundo plano assim que é escolhido
+                self.template_cache = ConversorCore.TemplateCache()
+                # Com CONVERSOR_SERVICE definida, a leitura dos reports e o
+                # processamento ficam no ConversorService (compartilhado); a janela
+                # só envia os jobs
+                url = os.environ.get(SERVICE_ENV)
+                self.service = ServiceClient(url) if url else None
+                self.core = ConversorCore
+        return self
 
 
 def main(page: ft.Page):
@@ -318,6 +123,8 @@ def main(page: ft.Page):
     days_controls = []
     days_process = []
     target_days = False
+    engine = Engine()
+    template_request = None
 
     button_target_excel = ft.ElevatedButton(
         "Selecione o Arquivo Excel",
@@ -337,11 +144,39 @@ def main(page: ft.Page):
             button_target_excel.icon = ft.Icons.ERROR_ROUNDED
         else:
             button_target_excel.text = e.files[0].name
-            button_target_excel.icon = ft.Icons.CHECK_ROUNDED
+            button_target_excel.icon = ft.Icons.HOURGLASS_EMPTY_ROUNDED
 
             excel_target = path
+            load_template_in_background(path)
         button_target_excel.update()
 
+    def load_template_in_background(path):
+        # Carrega e valida o template fora da thread da interface; o workbook
+        # fica pronto para o processamento enquanto o arquivo não mudar
+        nonlocal template_request
+        request = template_request = object()
+
+        def worker():
+            nonlocal excel_target
+            try:
+                engine.load().template_cache.preload(path)
+                error = None
+            except Exception as ex:
+                error = str(ex)
+            # Se outro arquivo foi escolhido nesse meio tempo, vale o mais recente
+            if request is not template_request:
+                return
+            if error:
+                excel_target = None
+                button_target_excel.icon = ft.Icons.ERROR_ROUNDED
+                log(f"Error: {error}")
+                show_error_dialog(error)
+            else:
+                button_target_excel.icon = ft.Icons.CHECK_ROUNDED
+            button_target_excel.update()
+
+        page.run_thread(worker)
+
     excel_file_picker = ft.FilePicker(on_result=pick_excel_file)
     page.overlay.append(excel_file_picker)  # Adiciona o FilePicker ao overlay
 
@@ -350,7 +185,7 @@ def main(page: ft.Page):
     )
 
     def update_days_columns():
-        print(days_controls)
+        logger.debug(days_controls)
         new_controls = []
 
         for i, dia in enumerate(days_controls):
@@ -418,75 +253,111 @@ def main(page: ft.Page):
         days_columns.content.controls = new_controls
         days_columns.update()
 
+    days_request = None
+
+    def load_days_in_background(report):
+        # findalldays roda fora da thread da interface; a leitura também já deixa
+        # o report no cache para o processamento
+        nonlocal days_request
+        request = days_request = object()
+
+        days_columns.content.controls = [
+            ft.Row(
+                [ft.ProgressRing(width=16, height=16), ft.Text("Procurando os dias...")],
+                spacing=10,
+            )
+        ]
+        days_columns.update()
+
+        def worker():
+            nonlocal days_controls
+            try:
+                loaded = engine.load()
+                if loaded.service is not None:
+                    days = loaded.service.days(report)
+                else:
+                    days = loaded.core.findalldays(report, loaded.report_cache)
+            except Exception as ex:
+                log(f"Error: {str(ex)}")
+                days = []
+            # Se outro arquivo foi escolhido nesse meio tempo, vale o mais recente
+            if request is days_request:
+                days_controls = days
+                update_days_columns()
+
+        page.run_thread(worker)
+
+    def report_button_text(files):
+        if len(files) > 1:
+            return f"{files[0].name} (+{len(files) - 1})"
+        return files[0].name
+
     def pick_mov_a_day_files(e: ft.FilePickerResultEvent):
-        nonlocal report_daytime_a, target_days, days_controls, file_name_day_a
+        nonlocal report_daytime_a, target_days, file_name_day_a
         path = None
         if e.files:
-            path = ", ".join(map(lambda f: f.path, e.files))
+            path = [f.path for f in e.files]  # Vários CSVs são juntados em um report
 
         if path is None:
             button_day_a.text = "Arquivo Não Selecionado"
             button_day_a.icon = ft.Icons.ERROR_ROUNDED
             file_name_day_a = ""
         else:
-            button_day_a.text = e.files[0].name
+            button_day_a.text = report_button_text(e.files)
             button_day_a.icon = ft.Icons.CHECK_ROUNDED
-            file_name_day_a = os.path.splitext(e.files[0].name)[0]  # Remove extensão
+            file_name_day_a = report_name(path)  # Sem extensão
 
             report_daytime_a = path
 
-            days_controls = findalldays(report_daytime_a)
-            update_days_columns()
+            load_days_in_background(report_daytime_a)
 
         button_day_a.update()
 
     def pick_mov_b_day_files(e: ft.FilePickerResultEvent):
-        nonlocal report_daytime_b, target_days, days_controls, file_name_day_b
+        nonlocal report_daytime_b, target_days, file_name_day_b
         path = None
         if e.files:
-            path = ", ".join(map(lambda f: f.path, e.files))
+            path = [f.path for f in e.files]  # Vários CSVs são juntados em um report
 
         if path is None:
             button_day_b.text = "Arquivo Não Selecionado"
             button_day_b.icon = ft.Icons.ERROR_ROUNDED
             file_name_day_b = ""
         else:
-            button_day_b.text = e.files[0].name
+            button_day_b.text = report_button_text(e.files)
             button_day_b.icon = ft.Icons.CHECK_ROUNDED
-            file_name_day_b = os.path.splitext(e.files[0].name)[0]  # Remove extensão
+            file_name_day_b = report_name(path)  # Sem extensão
 
             report_daytime_b = path
-            days_controls = findalldays(report_daytime_b)
-            update_days_columns()
+            load_days_in_background(report_daytime_b)
 
         button_day_b.update()
 
     def pick_mov_a_evening_files(e: ft.FilePickerResultEvent):
-        nonlocal report_evening_a, target_days, days_controls, file_name_evening_a
+        nonlocal report_evening_a, target_days, file_name_evening_a
         path = None
         if e.files:
-            path = ", ".join(map(lambda f: f.path, e.files))
+            path = [f.path for f in e.files]  # Vários CSVs são juntados em um report
 
         if path is None:
             button_evening_a.text = "Arquivo Não Selecionado"
             button_evening_a.icon = ft.Icons.ERROR_ROUNDED
             file_name_evening_a = ""
         else:
-            button_evening_a.text = e.files[0].name
+            button_evening_a.text = report_button_text(e.files)
             button_evening_a.icon = ft.Icons.CHECK_ROUNDED
-            file_name_evening_a = os.path.splitext(e.files[0].name)[0]  # Remove extensão
+            file_name_evening_a = report_name(path)  # Sem extensão
 
             report_evening_a = path
-            days_controls = findalldays(report_evening_a)
-            update_days_columns()
+            load_days_in_background(report_evening_a)
 
         button_evening_a.update()
 
     def pick_mov_b_evening_files(e: ft.FilePickerResultEvent):
-        nonlocal report_evening_b, target_days, days_controls, file_name_evening_b
+        nonlocal report_evening_b, target_days, file_name_evening_b
         path = None
         if e.files:
-            path = ", ".join(map(lambda f: f.path, e.files))
+            path = [f.path for f in e.files]  # Vários CSVs são juntados em um report
 
         if path is None:
             button_evening_b.text = "Arquivo Não Selecionado"
@@ -494,13 +365,12 @@ def main(page: ft.Page):
             file_name_evening_b = ""
 
         else:
-            button_evening_b.text = e.files[0].name
+            button_evening_b.text = report_button_text(e.files)
             button_evening_b.icon = ft.Icons.CHECK_ROUNDED
-            file_name_evening_b = os.path.splitext(e.files[0].name)[0]  # Remove extensão
+            file_name_evening_b = report_name(path)  # Sem extensão
 
             report_evening_b = path
-            days_controls = findalldays(report_evening_b)
-            update_days_columns()
+            load_days_in_background(report_evening_b)
 
         button_evening_b.update()
 
@@ -531,28 +401,28 @@ def main(page: ft.Page):
     button_day_a = ft.ElevatedButton(
         "Selecione o Mov.A",
         icon=ft.Icons.UPLOAD_FILE,
-        on_click=lambda _: file_picker_mov_a_day.pick_files(),
+        on_click=lambda _: file_picker_mov_a_day.pick_files(allow_multiple=True),
         width=300,
     )
 
     button_day_b = ft.ElevatedButton(
         "Selecione o Mov.B",
         icon=ft.Icons.UPLOAD_FILE,
-        on_click=lambda _: file_picker_mov_b_day.pick_files(),
+        on_click=lambda _: file_picker_mov_b_day.pick_files(allow_multiple=True),
         width=300,
     )
 
     button_evening_a = ft.ElevatedButton(
         "Selecione o Mov.A",
         icon=ft.Icons.UPLOAD_FILE,
-        on_click=lambda _: file_picker_mov_a_evening.pick_files(),
+        on_click=lambda _: file_picker_mov_a_evening.pick_files(allow_multiple=True),
         width=300,
     )
 
     button_evening_b = ft.ElevatedButton(
         "Selecione o Mov.B",
         icon=ft.Icons.UPLOAD_FILE,
-        on_click=lambda _: file_picker_mov_b_evening.pick_files(),
+        on_click=lambda _: file_picker_mov_b_evening.pick_files(allow_multiple=True),
         width=300,
     )
 
@@ -630,7 +500,7 @@ def main(page: ft.Page):
             "%H:%M"
         )
         button_end_diurno.update()
-        print(end_time.value)
+        logger.debug(end_time.value)
 
     def open_time_picker_diurno(e):
         page.open(
@@ -684,12 +554,16 @@ def main(page: ft.Page):
     )
 
     log_output = ft.Text(
-        "Informacões seram geradas aqui...\n",
+        LOG_HEADER,
         width=600,
         height=400,
         text_align=ft.TextAlign.CENTER,
     )
 
+    progress_bar = ft.ProgressBar(width=400, value=0, visible=False)
+    progress_text = ft.Text("", size=12, text_align=ft.TextAlign.CENTER)
+    cancel_event = threading.Event()
+
     def show_error_dialog(message):
         # Cria o AlertDialog
         error_dialog = ft.AlertDialog(
@@ -707,29 +581,13 @@ def main(page: ft.Page):
         page.open(error_dialog)
         page.update()
 
-    def log(message):
-        log_output.value += f"{message}\n"
-        page.update()
-
-    def generate_date_range(days_controls):
-        valid_dates = []
-
-        print("📋 Iniciando generate_date_range")
-        print(f"🔢 Total de dias recebidos: {len(days_controls)}")
-        print(f"🎯 days_controls: {days_controls}")
+    setup_logging(os.path.join(current_directory, "logs"))
+    log_sink = UiLogSink(page, log_output)
+    logger.addHandler(log_sink)
+    page.on_disconnect = lambda _: logger.removeHandler(log_sink)
 
-        for i, day in enumerate(days_controls):
-            if day["boolean"]:
-                valid_dates.append(day["data"])
-                print(
-                    f"✅ Checkbox DIA {i+1} marcado → usando data existente: {day['data']}"
-                )
-            else:
-                valid_dates.append("empty")
-                print(f"❎ Checkbox DIA {i+1} desmarcado → adicionando: 'empty'")
-
-        print(f"\n📤 Lista final de datas válidas: {valid_dates}")
-        return valid_dates
+    def log(message):
+        logger.info(message)
 
     def reset_app():
         # Limpar variáveis globais
@@ -743,8 +601,11 @@ def main(page: ft.Page):
         file_name_day_b = ""
         file_name_evening_a = ""
         file_name_evening_b = ""
-        log_output.value = "Informacões seram geradas aqui...\n"
+        log_sink.clear()
         excel_target = None
+        loaded = engine.load()
+        loaded.report_cache.clear()
+        loaded.template_cache.clear()
 
         # Resetar interface
         button_target_excel.text = "Selecione o Arquivo Excel"
@@ -801,78 +662,8 @@ def main(page: ft.Page):
                 show_error_dialog("Nenhum report foi selecionado")
                 return
 
-            # Configuration
-            MAINCONFIG = {
-                "output_folder": output_folder,
-                "old_folder": old_folder,
-                "excel_target": excel_target,
-                "days_process": len(days_controls),
-                "report_evening_a": report_evening_a,
-                "report_evening_b": report_evening_b,
-                "report_daytime_a": report_daytime_a,
-                "report_daytime_b": report_daytime_b,
-            }
-            DATES_TO_PROCESS = generate_date_range(days_controls)
-
-            CONFIGURATIONS = [
-                {
-                    "name": "Madrugada",
-                    "start_hour": "00:00",
-                    "end_hour": end_time_madrugada,
-                    "days_process": MAINCONFIG["days_process"],
-                    "excel_target": MAINCONFIG["excel_target"],
-                    "start_rows": calculate_start_row_array("00:00"),
-                    "days_controls": days_controls,
-                    "move_files": False,
-                    "files_to_process_group_a": [
-                        (MAINCONFIG["report_evening_a"], date)
-                        for date in DATES_TO_PROCESS
-                    ],
-                    "files_to_process_group_b": [
-                        (MAINCONFIG["report_evening_b"], date)
-                        for date in DATES_TO_PROCESS
-                    ],
-                },
-                {
-                    "name": "Período Diurno",
-                    "start_hour": start_time.value,
-                    "end_hour": end_time.value,
-                    "days_process": MAINCONFIG["days_process"],
-                    "excel_target": MAINCONFIG["excel_target"],
-                    "start_rows": calculate_start_row_array(start_time.value),
-                    "days_controls": days_controls,
-                    "move_files": True,
-                    "files_to_process_group_a": [
-                        (MAINCONFIG["report_daytime_a"], date)
-                        for date in DATES_TO_PROCESS
-                    ],
-                    "files_to_process_group_b": [
-                        (MAINCONFIG["report_daytime_b"], date)
-                        for date in DATES_TO_PROCESS
-                    ],
-                },
-                {
-                    "name": "Período Noturno",
-                    "start_hour": start_time_night,
-                    "end_hour": "23:45",
-                    "days_process": MAINCONFIG["days_process"],
-                    "excel_target": MAINCONFIG["excel_target"],
-                    "start_rows": calculate_start_row_array(start_time_night),
-                    "days_controls": days_controls,
-                    "move_files": True,
-                    "files_to_process_group_a": [
-                        (MAINCONFIG["report_evening_a"], date)
-                        for date in DATES_TO_PROCESS
-                    ],
-                    "files_to_process_group_b": [
-                        (MAINCONFIG["report_evening_b"], date)
-                        for date in DATES_TO_PROCESS
-                    ],
-                },
-            ]
-
             os.makedirs(old_folder, exist_ok=True)
-            
+
             # Preparar os nomes dos arquivos para passar para process_configuration
             file_names = {
                 'day_a': file_name_day_a if file_name_day_a else None,
@@ -880,21 +671,121 @@ def main(page: ft.Page):
                 'evening_a': file_name_evening_a if file_name_evening_a else None,
                 'evening_b': file_name_evening_b if file_name_evening_b else None
             }
-            
-            for config in CONFIGURATIONS:
-                log(f"Iniciando o processamento de {config['name']}...")
-                print(config)
-                process_configuration(config, output_folder, log, file_names)
-                log(f"Processamento de {config['name']} concluído com sucesso.")
-
-            move_files_to_old_folder(CONFIGURATIONS, old_folder)
+
+            job = {
+                "excel_target": excel_target,
+                "report_evening_a": report_evening_a,
+                "report_evening_b": report_evening_b,
+                "report_daytime_a": report_daytime_a,
+                "report_daytime_b": report_daytime_b,
+                "start_diurno": start_time.value,
+                "end_diurno": start_time_night,
+                "days": days_controls,
+                "file_names": file_names,
+                "output_folder": output_folder,
+            }
+
+            # O processamento roda em outra thread para não travar a janela
+            cancel_event.clear()
+            set_running(True)
+            page.run_thread(process_job, job)
+        except Exception as ex:
+            log(f"Error: {str(ex)}")  # Loga o erro na interface e no console
+
+    def process_job(job):
+        loaded = engine.load()
+        core = loaded.core
+        try:
+            if loaded.service is not None:
+                CONFIGURATIONS = loaded.service.run_job(
+                    job, log, progress=on_progress, cancel_event=cancel_event
+                )
+            else:
+                CONFIGURATIONS = core.run_job(
+                    job,
+                    log,
+                    cache=loaded.report_cache,
+                    progress=on_progress,
+                    cancel_event=cancel_event,
+                    templates=loaded.template_cache,
+                )
+
+            core.move_files_to_old_folder(CONFIGURATIONS, old_folder)
             log("Script concluido com sucesso.")  # Green text
 
-            time.sleep(5)
+            time.sleep(5)  # Mantém o log visível; roda fora da thread da interface
             reset_app()
             # page.window.close()  # Fecha o programa
+        except core.RunCancelled:
+            log("Processamento cancelado. O arquivo Excel não foi alterado.")
         except Exception as ex:
             log(f"Error: {str(ex)}")  # Loga o erro na interface e no console
+        finally:
+            set_running(False)
+
+    def set_running(running):
+        button_run.disabled = running
+        button_cancel.disabled = not running
+        progress_bar.visible = running
+        if running:
+            progress_bar.value = 0
+            progress_text.value = ""
+        page.update()
+
+    def cancel_run(e):
+        cancel_event.set()
+        button_cancel.disabled = True
+        log("Cancelando o processamento...")
+
+    def on_progress(event):
+        stage = event["stage"]
+        if stage == "load":
+            progress_text.value = "Abrindo o arquivo Excel..."
+        elif stage == "configuration":
+            progress_text.value = f"{event['configuration']}..."
+        elif stage == "extract":
+            progress_bar.value = event["done"] / event["total"]
+            progress_text.value = (
+                f"{event['configuration']} - Mov.{event['group']} - "
+                f"{event['day']}: {event['rows']} linhas"
+            )
+        elif stage == "write":
+            progress_text.value = (
+                f"{event['configuration']} - Mov.{event['group']}: "
+                f"{event['rows']} linhas escritas"
+            )
+        elif stage == "save":
+            progress_text.value = "Salvando o arquivo Excel..."
+        elif stage == "done":
+            progress_bar.value = 1
+            progress_text.value = "Concluído"
+        page.update()
+
+    button_run = ft.ElevatedButton(
+        "Iniciar Processamento ",
+        icon=ft.Icons.CHECK_ROUNDED,
+        on_click=run_script,
+        width=400,
+        color=ft.Colors.GREEN,
+    )
+    def on_streaming_change(e):
+        # Leitura em partes: só os dias selecionados ficam em memória
+        report_cache = engine.load().report_cache
+        report_cache.streaming = e.control.value
+        report_cache.clear()
+
+    streaming_checkbox = ft.Checkbox(
+        label="Economizar memória (ler os CSVs em partes)",
+        value=False,
+        on_change=on_streaming_change,
+    )
+    button_cancel = ft.ElevatedButton(
+        "Cancelar",
+        icon=ft.Icons.CANCEL_ROUNDED,
+        on_click=cancel_run,
+        disabled=True,
+        color=ft.Colors.RED,
+    )
 
     # UI Layout
     page.add(
@@ -935,12 +826,17 @@ def main(page: ft.Page):
                         alignment=ft.MainAxisAlignment.CENTER,  # Centraliza os itens na linha
                     ),
                     ft.Container(
-                        ft.ElevatedButton(
-                            "Iniciar Processamento ",
-                            icon=ft.Icons.CHECK_ROUNDED,
-                            on_click=run_script,
-                            width=400,
-                            color=ft.Colors.GREEN,
+                        ft.Column(
+                            [
+                                ft.Row(
+                                    [button_run, button_cancel],
+                                    alignment=ft.MainAxisAlignment.CENTER,
+                                ),
+                                streaming_checkbox,
+                                progress_bar,
+                                progress_text,
+                            ],
+                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                         ),
                         ft.Text("Logs:", size=16, weight="bold"),
                         alignment=ft.alignment.center,
@@ -962,5 +858,17 @@ def main(page: ft.Page):
         ),
     )
 
+    record_startup("first_frame")
+
+    # Com a janela já desenhada, carrega o processamento em segundo plano
+    def warm_up():
+        engine.load()
+        record_startup("ready")
+        if os.environ.get(STARTUP_PROBE_ENV):
+            page.window.destroy()
+
+    page.run_thread(warm_up)
+
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import os
+
+# Reports como a interface e os jobs os informam: um caminho de CSV ou uma lista
+# de CSVs do mesmo movimento. Só tratamento de caminhos, sem pandas, para a
+# interface poder usar antes do ConversorCore carregar.
+
+
+def report_files(report):
+    if not report:
+        return []
+    if isinstance(report, str):
+        return [report]
+    return [path for path in report if path]
+
+
+def report_key(report):
+    return tuple(os.path.abspath(path) for path in report_files(report))
+
+
+def is_csv_report(report):
+    files = report_files(report)
+    return bool(files) and all(path.endswith(".csv") for path in files)
+
+
+def report_name(report):
+    # Nome mostrado na interface e nos Títulos: o primeiro arquivo e quantos mais
+    files = report_files(report)
+    if not files:
+        return ""
+    name = os.path.splitext(os.path.basename(files[0]))[0]
+    return f"{name} (+{len(files) - 1})" if len(files) > 1 else name
@@ -0,0 +1,402 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ConversorCache import DiskReportCache
+from ConversorCore import ReportCache, RunCancelled, findalldays, run_job
+
+# Serviço local de processamento: vários analistas (ou várias janelas do
+# ConversorGUI) mandam jobs para um único processo, que mantém os reports já
+# lidos em memória e no cache em disco. Só usa a biblioteca padrão.
+#
+#   python ConversorService.py [--port 8765] [-w 2]
+#
+# API HTTP (JSON), só em 127.0.0.1 por padrão:
+#   POST /jobs              job no formato do ConversorCLI -> {"id", "status"}
+#   GET  /jobs              últimos jobs
+#   GET  /jobs/<id>?since=N estado, progresso e linhas de log a partir da N-ésima
+#   POST /jobs/<id>/cancel  cancela um job na fila ou em andamento
+#   POST /days              {"report": ...} -> dias com contagem (findalldays)
+#   GET  /health
+# A fila fica em um SQLite (--db); jobs interrompidos por uma parada do serviço
+# voltam para a fila quando ele reinicia. O ConversorGUI vira cliente do serviço
+# quando a variável CONVERSOR_SERVICE tem o endereço (ex.: http://127.0.0.1:8765).
+
+SERVICE_ENV = "CONVERSOR_SERVICE"
+SERVICE_DB_ENV = "CONVERSOR_SERVICE_DB"
+DEFAULT_PORT = 8765
+# Reports mantidos em memória entre um job e outro
+SERVICE_MAX_REPORTS = 16
+LOG_LINES = 500
+# Linhas de log guardadas na fila (coluna result) quando o job termina
+FINISHED_LOG_LINES = 100
+
+logger = logging.getLogger("conversor")
+
+
+def default_db_path():
+    if os.environ.get(SERVICE_DB_ENV):
+        return os.environ[SERVICE_DB_ENV]
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return os.path.join(os.environ["LOCALAPPDATA"], "ReportsConverter", "jobs.sqlite3")
+    return os.path.join(
+        os.path.expanduser("~"), ".local", "share", "reports-converter", "jobs.sqlite3"
+    )
+
+
+class JobQueue:
+    # Fila persistente de jobs. Estados: queued, running, done, error, cancelled
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    job TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    submitted REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    error TEXT,
+                    result TEXT
+                )"""
+            )
+            self._db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+
+    def submit(self, job):
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (status, job, target, submitted) VALUES ('queued', ?, ?, ?)",
+                (json.dumps(job), os.path.abspath(job["excel_target"]), time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim(self):
+        # Próximo job da fila cujo workbook não está sendo processado por outro
+        with self._lock, self._db:
+            row = self._db.execute(
+                """SELECT * FROM jobs WHERE status = 'queued' AND target NOT IN
+                   (SELECT target FROM jobs WHERE status = 'running')
+                   ORDER BY id LIMIT 1"""
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', started = ? WHERE id = ?",
+                (time.time(), row["id"]),
+            )
+            return row["id"], json.loads(row["job"])
+
+    def finish(self, job_id, status, error=None, result=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = ?, result = ? WHERE id = ?",
+                (status, time.time(), error, json.dumps(result, default=str), job_id),
+            )
+
+    def cancel_queued(self, job_id):
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            return cursor.rowcount > 0
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list(self, limit=50):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def _row_to_dict(self, row):
+        job = json.loads(row["job"])
+        return {
+            "id": row["id"],
+            "name": job.get("name") or os.path.basename(row["target"]),
+            "status": row["status"],
+            "excel_target": row["target"],
+            "submitted": row["submitted"],
+            "started": row["started"],
+            "finished": row["finished"],
+            "error": row["error"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+        }
+
+
+class ProcessingService:
+    # Workers (threads) que tiram jobs da fila e rodam o run_job com um único
+    # ReportCache, então um report lido para um job serve para os próximos
+    def __init__(self, queue, workers=2, cache=None, poll_interval=0.5):
+        self.queue = queue
+        self.workers = workers
+        self.cache = cache or ReportCache(disk_cache=DiskReportCache())
+        self.poll_interval = poll_interval
+        self._live = {}  # id -> {"log": deque, "lines": total, "progress": último evento}
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"worker-{i}", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            claimed = self.queue.claim()
+            if claimed is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._run(*claimed)
+
+    def _run(self, job_id, job):
+        cancel_event = threading.Event()
+        live = {"log": deque(maxlen=LOG_LINES), "lines": 0, "progress": None}
+        with self._lock:
+            self._live[job_id] = live
+            self._cancel_events[job_id] = cancel_event
+
+        def log(message):
+            with self._lock:
+                live["log"].append(message)
+                live["lines"] += 1
+
+        def progress(event):
+            live["progress"] = event
+
+        def finished(status, error=None, **result):
+            # O log e o progresso vão para a fila e saem da memória do serviço
+            with self._lock:
+                result.update(
+                    log=list(live["log"])[-FINISHED_LOG_LINES:],
+                    lines=live["lines"],
+                    progress=live["progress"],
+                )
+            self.queue.finish(job_id, status, error=error, result=result)
+
+        try:
+            configurations = run_job(
+                job, log, cache=self.cache, progress=progress, cancel_event=cancel_event
+            )
+            finished("done", configurations=configurations)
+        except RunCancelled:
+            finished("cancelled")
+        except Exception as e:
+            log(traceback.format_exc())
+            finished("error", error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+                self._live.pop(job_id, None)
+            self.cache.trim(SERVICE_MAX_REPORTS)
+
+    def status(self, job_id, since=0):
+        status = self.queue.get(job_id)
+        if status is None:
+            return None
+        with self._lock:
+            live = self._live.get(job_id)
+            if live is not None:
+                live = {**live, "log": list(live["log"])}
+        if live is None:
+            # Job terminado: o que ficou guardado na fila
+            live = status.get("result") or {}
+        if "log" in live:
+            lines = live["log"]
+            first = live["lines"] - len(lines)  # Índice da linha mais antiga guardada
+            status["log"] = lines[max(since - first, 0):]
+            status["lines"] = live["lines"]
+            status["progress"] = live["progress"]
+        return status
+
+    def cancel(self, job_id):
+        if self.queue.cancel_queued(job_id):
+            return True
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+        if cancel_event is None:
+            return False
+        cancel_event.set()
+        return True
+
+    def days(self, report):
+        return findalldays(report, self.cache)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service = None  # ProcessingService, definido em serve()
+
+    def _send(self, code, data):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self):
+        path, _, query = self.path.partition("?")
+        parts = [part for part in path.split("/") if part]
+        params = dict(item.partition("=")[::2] for item in query.split("&") if item)
+        return parts, params
+
+    def do_GET(self):
+        parts, params = self._route()
+        try:
+            limit = int(params.get("limit", 50))
+            since = int(params.get("since", 0))
+        except ValueError as e:
+            self._send(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        if parts == ["health"]:
+            self._send(200, {"status": "ok"})
+        elif parts == ["jobs"]:
+            self._send(200, {"jobs": self.service.queue.list(limit)})
+        elif len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            status = self.service.status(int(parts[1]), since)
+            if status is None:
+                self._send(404, {"error": "Job não encontrado"})
+            else:
+                self._send(200, status)
+        else:
+            self._send(404, {"error": "Endereço desconhecido"})
+
+    def do_POST(self):
+        parts, _ = self._route()
+        try:
+            if parts == ["jobs"]:
+                job = self._read_json()
+                if not job.get("excel_target"):
+                    raise ValueError("Job sem excel_target")
+                self._send(201, {"id": self.service.queue.submit(job), "status": "queued"})
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel" and parts[1].isdigit():
+                self._send(200, {"cancelled": self.service.cancel(int(parts[1]))})
+            elif parts == ["days"]:
+                self._send(200, {"days": self.service.days(self._read_json()["report"])})
+            else:
+                self._send(404, {"error": "Endereço desconhecido"})
+        except Exception as e:
+            self._send(400, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class ServiceClient:
+    # Cliente usado pelo ConversorGUI quando CONVERSOR_SERVICE está definida
+    def __init__(self, url, poll_interval=0.5):
+        self.url = url.rstrip("/")
+        self.poll_interval = poll_interval
+
+    def _request(self, method, path, data=None):
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        request = urllib.request.Request(
+            self.url + path,
+            data=body,
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read()).get("error", str(e))) from None
+
+    def submit(self, job):
+        return self._request("POST", "/jobs", job)["id"]
+
+    def status(self, job_id, since=0):
+        return self._request("GET", f"/jobs/{job_id}?since={since}")
+
+    def cancel(self, job_id):
+        return self._request("POST", f"/jobs/{job_id}/cancel", {})["cancelled"]
+
+    def days(self, report):
+        return self._request("POST", "/days", {"report": report})["days"]
+
+    def run_job(self, job, log=print, progress=None, cancel_event=None):
+        # Mesmo contrato do ConversorCore.run_job, mas processando no serviço
+        job_id = self.submit(job)
+        log(f"Job {job_id} enviado para {self.url}")
+        lines = 0
+        cancel_sent = False
+        while True:
+            status = self.status(job_id, since=lines)
+            for message in status.get("log", []):
+                log(message)
+            lines = status.get("lines", lines)
+            if progress is not None and status.get("progress"):
+                progress(status["progress"])
+            if status["status"] == "done":
+                return status["result"]["configurations"]
+            if status["status"] == "cancelled":
+                raise RunCancelled("Processamento cancelado")
+            if status["status"] == "error":
+                raise RuntimeError(status["error"])
+            if cancel_event is not None and cancel_event.is_set() and not cancel_sent:
+                self.cancel(job_id)
+                cancel_sent = True
+            time.sleep(self.poll_interval)
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=2, db_path=None):
+    queue = JobQueue(db_path or default_db_path())
+    service = ProcessingService(queue, workers)
+    service.start()
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"Serviço em http://{host}:{server.server_address[1]} ({workers} worker(s))")
+    try:
+        server.serve_forever()
+    finally:
+        service.stop()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de processamento do Reports Converter")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço (padrão: só esta máquina)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Porta HTTP")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Jobs processados ao mesmo tempo")
+    parser.add_argument("--db", help="Arquivo SQLite da fila de jobs")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostra as mensagens de depuração")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    try:
+        serve(args.host, args.port, args.workers, args.db)
+    except KeyboardInterrupt:
+        logger.info("Encerrado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
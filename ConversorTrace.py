@@ -0,0 +1,154 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# Instrumentação das etapas do processamento (leitura dos CSVs, recortes,
+# xlsx temporários, carga e gravação do workbook).
+#
+# Desligada por padrão. Para ligar:
+#   - variável de ambiente CONVERSOR_TRACE=<pasta>: ao sair, grava
+#     trace-<data>-<pid>.json e trace-<data>-<pid>.trace.json nessa pasta;
+#   - ConversorCLI.py --trace <prefixo>.
+# O .trace.json está no formato do Chrome (chrome://tracing ou ui.perfetto.dev).
+
+TRACE_ENV = "CONVERSOR_TRACE"
+
+
+class _NullSpan:
+    # Usado quando o trace está desligado: não mede nem guarda nada
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        # Início em horário de relógio, para alinhar spans de processos diferentes
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.spans.append(
+            {
+                "name": self.name,
+                "start": self.wall_start,
+                "seconds": end - self.start,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": self.args,
+            }
+        )
+        return False
+
+    def __setitem__(self, key, value):
+        # Permite registrar linhas/bytes depois que a etapa já começou
+        self.args[key] = value
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def drain(self):
+        spans, self.spans = self.spans, []
+        return spans
+
+    def summary(self, spans=None):
+        # Totais por etapa, configuração e grupo
+        totals = {}
+        for span in self.spans if spans is None else spans:
+            args = span["args"]
+            key = " / ".join(
+                str(part)
+                for part in (span["name"], args.get("configuration"), args.get("group"))
+                if part is not None
+            )
+            total = totals.setdefault(
+                key, {"count": 0, "seconds": 0.0, "rows": 0, "bytes_read": 0, "bytes_written": 0}
+            )
+            total["count"] += 1
+            total["seconds"] += span["seconds"]
+            for field in ("rows", "bytes_read", "bytes_written"):
+                total[field] += args.get(field, 0) or 0
+        return totals
+
+    def export_json(self, path, spans=None):
+        spans = self.spans if spans is None else spans
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"spans": spans, "summary": self.summary(spans)},
+                f,
+                indent=2,
+                ensure_ascii=False,
+                default=str,
+            )
+
+    def export_chrome_trace(self, path, spans=None):
+        spans = self.spans if spans is None else spans
+        origin = min((span["start"] for span in spans), default=0)
+        events = [
+            {
+                "name": span["name"],
+                "ph": "X",
+                "ts": (span["start"] - origin) * 1e6,
+                "dur": span["seconds"] * 1e6,
+                "pid": span["pid"],
+                "tid": span["tid"],
+                "args": span["args"],
+            }
+            for span in spans
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events}, f, ensure_ascii=False, default=str)
+
+    def export(self, prefix, spans=None):
+        self.export_json(f"{prefix}.json", spans)
+        self.export_chrome_trace(f"{prefix}.trace.json", spans)
+
+
+tracer = Tracer()
+
+
+def span(name, **args):
+    if not tracer.enabled:
+        return NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def _export_on_exit(folder):
+    if tracer.spans:
+        os.makedirs(folder, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        tracer.export(os.path.join(folder, f"trace-{stamp}-{os.getpid()}"))
+
+
+if os.environ.get(TRACE_ENV):
+    tracer.enable()
+    atexit.register(_export_on_exit, os.environ[TRACE_ENV])
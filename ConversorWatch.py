@@ -0,0 +1,223 @@
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ConversorCLI import execute_job, load_document, resolve_job
+from ConversorCore import REPORT_KEYS, move_to_old_folder, report_files
+
+# Modo watch: processa sozinho os exports do PERCI que chegam em uma pasta.
+#
+#   python ConversorWatch.py <entrada> --templates <pasta dos workbooks> [-w 2]
+#
+# Os CSVs são agrupados por ponto pelo nome: <ponto>_<A|B>_<dia|noite>[_sufixo].csv
+# (ex.: P01_A_dia.csv, P01_B_noite_2.csv). Vários arquivos no mesmo movimento são
+# juntados em um report só. O workbook do ponto é <templates>/<ponto>.xlsx.
+# Um arquivo <ponto>.job.json (ou .yaml) na pasta de entrada substitui a convenção:
+# é um job no formato do ConversorCLI, com caminhos relativos à pasta de entrada.
+#
+# Um ponto é processado quando todos os seus arquivos estão parados (mesmo tamanho
+# e data em duas varreduras seguidas e sem mudança há --settle segundos), para não
+# ler arquivos ainda sendo copiados, e quando todos os movimentos esperados chegaram:
+# pela convenção, os quatro (A e B, dia e noite); com o arquivo de job, os reports
+# que ele lista. Enquanto faltar algum, o ponto espera, mesmo com os outros parados.
+# Depois do processamento, os CSVs (e o job, se
+# houver) vão para a pasta old. Se o processamento falhar (inclusive quando só
+# algum dos CSVs não pode ser lido, ver BlocksFailed), os arquivos ficam na
+# entrada e só são tentados de novo se mudarem.
+
+REPORT_NAME_RE = re.compile(
+    r"^(?P<point>.+?)_(?P<group>[AB])_(?P<period>dia|noite)(?:_[^.]*)?\.csv$",
+    re.IGNORECASE,
+)
+JOB_NAME_RE = re.compile(r"^(?P<point>.+)\.job\.(?:json|ya?ml)$", re.IGNORECASE)
+REPORT_SLOTS = {
+    ("A", "dia"): "report_daytime_a",
+    ("B", "dia"): "report_daytime_b",
+    ("A", "noite"): "report_evening_a",
+    ("B", "noite"): "report_evening_b",
+}
+
+logger = logging.getLogger("conversor")
+
+
+class InboxWatcher:
+    def __init__(self, inbox, templates, old_folder, settle=30.0, defaults=None):
+        self.inbox = inbox
+        self.templates = templates
+        self.old_folder = old_folder
+        self.settle = settle
+        self.defaults = defaults or {}
+        self._seen = {}  # caminho -> (tamanho, mtime) da varredura anterior
+        self.unsettled = set()  # Pontos com arquivos ainda mudando na última varredura
+        self._failed = {}  # ponto -> arquivos (com tamanho/mtime) da tentativa que falhou
+        self._warned = set()
+
+    def scan(self):
+        # Arquivos da entrada agrupados por ponto: {ponto: {caminho: (tamanho, mtime)}}
+        now = time.time()
+        seen, points, unsettled = {}, {}, set()
+        with os.scandir(self.inbox) as entries:
+            for entry in entries:
+                match = REPORT_NAME_RE.match(entry.name) or JOB_NAME_RE.match(entry.name)
+                if match is None or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                seen[entry.path] = signature
+                point = match.group("point")
+                points.setdefault(point, {})[entry.path] = signature
+                if (
+                    self._seen.get(entry.path) != signature
+                    or now - stat.st_mtime < self.settle
+                ):
+                    unsettled.add(point)
+        self._seen = seen
+        self.unsettled = unsettled
+        return {point: files for point, files in points.items() if point not in unsettled}
+
+    def build_job(self, point, files):
+        # Job do ponto, pelo arquivo .job.json/.yaml ou pela convenção de nomes
+        job_files = [path for path in files if JOB_NAME_RE.match(os.path.basename(path))]
+        if job_files:
+            job = resolve_job(load_document(job_files[0]), self.inbox)
+            job.setdefault("name", point)
+            inputs = [path for key in REPORT_KEYS for path in report_files(job.get(key))]
+            return job, inputs + job_files
+
+        job = {
+            **self.defaults,
+            "name": point,
+            "excel_target": os.path.join(self.templates, f"{point}.xlsx"),
+        }
+        for path in sorted(files):
+            match = REPORT_NAME_RE.match(os.path.basename(path))
+            slot = REPORT_SLOTS[(match.group("group").upper(), match.group("period").lower())]
+            job.setdefault(slot, []).append(path)
+        return job, sorted(files)
+
+    def ready_jobs(self, busy_points, busy_targets):
+        # Jobs dos pontos prontos para processar: parados, que não falharam com
+        # exatamente os mesmos arquivos e cujo ponto e workbook não estão em uso
+        # (dois jobs no mesmo workbook ao mesmo tempo se sobrescreveriam)
+        jobs = []
+        busy_targets = set(busy_targets)
+        for point, files in sorted(self.scan().items()):
+            if point in busy_points or self._failed.get(point) == files:
+                continue
+            try:
+                job, inputs = self.build_job(point, files)
+            except Exception as e:
+                self._fail(point, files, f"Job inválido: {e}")
+                continue
+            missing = [path for path in [job["excel_target"], *inputs] if not os.path.exists(path)]
+            if not any(JOB_NAME_RE.match(os.path.basename(path)) for path in files):
+                # Pela convenção, espera os quatro movimentos
+                missing += [
+                    f"{point}_{group}_{period}.csv"
+                    for (group, period), slot in REPORT_SLOTS.items()
+                    if slot not in job
+                ]
+            if missing:
+                if (point, tuple(missing)) not in self._warned:
+                    self._warned.add((point, tuple(missing)))
+                    logger.warning(f"[{point}] aguardando arquivos: {missing}")
+                continue
+            target = os.path.abspath(job["excel_target"])
+            if target in busy_targets:
+                continue
+            busy_targets.add(target)
+            jobs.append((point, files, job, inputs))
+        return jobs
+
+    def finish(self, point, files, inputs, result):
+        if result["status"] != "ok":
+            self._fail(point, files, result["error"])
+            return
+        self._failed.pop(point, None)
+        for path in inputs:
+            if os.path.exists(path):
+                move_to_old_folder(path, self.old_folder)
+        logger.info(f"[{point}] concluído em {result['seconds']:.1f}s")
+
+    def _fail(self, point, files, error):
+        # Não tenta de novo até algum arquivo do ponto mudar
+        self._failed[point] = files
+        logger.error(f"[{point}] falhou: {error}")
+
+
+def watch(watcher, workers=None, interval=5.0, once=False):
+    # Varre a entrada a cada interval segundos e processa os pontos prontos em um
+    # pool de processos limitado. Com once=True, para quando não houver mais nada
+    # pronto nem em andamento.
+    running = {}  # future -> (ponto, arquivos, entradas, workbook)
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        while True:
+            for future in [f for f in running if f.done()]:
+                point, files, inputs, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:  # O processo morreu (memória, etc.)
+                    result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+                watcher.finish(point, files, inputs, result)
+
+            busy_points = {task[0] for task in running.values()}
+            busy_targets = {task[3] for task in running.values()}
+            for point, files, job, inputs in watcher.ready_jobs(busy_points, busy_targets):
+                logger.info(f"[{point}] processando {len(inputs)} arquivo(s)")
+                running[pool.submit(execute_job, job)] = (
+                    point,
+                    files,
+                    inputs,
+                    os.path.abspath(job["excel_target"]),
+                )
+
+            if once and not running and not watcher.unsettled:
+                return
+            time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa automaticamente os CSVs que chegam em uma pasta")
+    parser.add_argument("inbox", help="Pasta de entrada dos CSVs do PERCI")
+    parser.add_argument("--templates", help="Pasta dos workbooks <ponto>.xlsx (padrão: a pasta de entrada)")
+    parser.add_argument("--old", help="Pasta para onde vão os arquivos processados (padrão: <entrada>/old)")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Número de processos")
+    parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre as varreduras")
+    parser.add_argument("--settle", type=float, default=30.0, help="Segundos sem mudança para considerar um arquivo completo")
+    parser.add_argument("--start-diurno", default="06:00", help="Início do período diurno")
+    parser.add_argument("--end-diurno", default="18:00", help="Fim do período diurno")
+    parser.add_argument("--streaming", action="store_true", help="Lê os CSVs em partes, mantendo em memória só os dias usados")
+    parser.add_argument("--once", action="store_true", help="Processa o que estiver pronto e sai")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostra as mensagens de depuração")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    inbox = os.path.abspath(args.inbox)
+    watcher = InboxWatcher(
+        inbox,
+        templates=os.path.abspath(args.templates or inbox),
+        old_folder=os.path.abspath(args.old or os.path.join(inbox, "old")),
+        settle=args.settle,
+        defaults={
+            "start_diurno": args.start_diurno,
+            "end_diurno": args.end_diurno,
+            "streaming": args.streaming,
+        },
+    )
+    logger.info(f"Observando {inbox}")
+    try:
+        watch(watcher, args.workers, args.interval, args.once)
+    except KeyboardInterrupt:
+        logger.info("Encerrado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from html import unescape
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.datetime import from_ISO8601
+from openpyxl.worksheet.cell_range import MultiCellRange
+
+# Gravação direta no .xlsx, sem carregar o workbook inteiro com openpyxl.
+# O processamento só escreve em duas planilhas de contagem e em algumas células
+# dos Títulos; aqui só essas planilhas são reescritas (as células alvo são
+# substituídas no XML, o resto da planilha fica como está) e todas as outras
+# partes do arquivo (estilos, gráficos, imagens, outras planilhas) são copiadas
+# sem alteração. O tempo de gravação depende do que é escrito, não do template.
+#
+# A interface imita a parte do openpyxl usada pelo ConversorCore: sheetnames,
+# book[nome], ws.cell(row=, column=, value=) (com .value para ler/gravar),
+# ws.merged_cells e book.save(caminho). Como no openpyxl, value=None não altera a
+# célula. Os valores atuais de uma planilha só são lidos se alguém pedir .value.
+#
+# Ao salvar, o calcChain.xml é descartado e o workbook é marcado com
+# fullCalcOnLoad, para o Excel recalcular as fórmulas que dependem das contagens
+# (o openpyxl faz o mesmo).
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT = NS_REL + "/officeDocument"
+WORKSHEET = NS_REL + "/worksheet"
+SHARED_STRINGS = NS_REL + "/sharedStrings"
+
+SHEET_DATA_RE = re.compile(r"<sheetData\s*/>|<sheetData>(.*?)</sheetData>", re.S)
+ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+MERGE_RE = re.compile(r'<mergeCell\b[^>]*\bref="([^"]+)"')
+ROW_NUMBER_RE = re.compile(r'\br="(\d+)"')
+CELL_REF_RE = re.compile(r'\br="([A-Z]+)(\d+)"')
+STYLE_RE = re.compile(r'\bs="(\d+)"')
+TYPE_RE = re.compile(r'\bt="(\w+)"')
+VALUE_RE = re.compile(r"<v>(.*?)</v>", re.S)
+FORMULA_RE = re.compile(r"<f\b[^>]*?(?:/>|>(.*?)</f>)", re.S)
+TEXT_RE = re.compile(r"<t\b[^>]*?(?:/>|>(.*?)</t>)", re.S)
+SPANS_RE = re.compile(r'\s+spans="[^"]*"')
+CALC_PR_RE = re.compile(r"<calcPr\b[^>]*?/?>")
+# Elementos que vêm depois do calcPr no workbook.xml, para inserir antes deles
+AFTER_CALC_PR_RE = re.compile(
+    r"<(?:oleSize|customWorkbookViews|pivotCaches|smartTagPr|smartTagTypes|"
+    r"webPublishing|fileRecoveryPr|webPublishObjects|extLst)\b|</workbook>"
+)
+CALC_CHAIN_REL_RE = re.compile(r"<Relationship\b[^>]*calcChain[^>]*/>")
+CALC_CHAIN_TYPE_RE = re.compile(r'<Override\b[^>]*PartName="/xl/calcChain.xml"[^>]*/>')
+
+
+def resolve_target(base_part, target):
+    # Caminho da parte dentro do zip a partir do Target de um .rels
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def rels_part(part):
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def copy_info(info):
+    # Mesmo nome, data e compressão da parte original
+    new_info = zipfile.ZipInfo(info.filename, info.date_time)
+    new_info.compress_type = info.compress_type
+    new_info.external_attr = info.external_attr
+    new_info.file_size = info.file_size
+    return new_info
+
+
+def cell_xml(ref, value, style):
+    style = f' s="{style}"' if style else ""
+    if value is None:
+        return f'<c r="{ref}"{style}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style}><v>{value!r}</v></c>'
+    if isinstance(value, str):
+        return (
+            f'<c r="{ref}"{style} t="inlineStr"><is>'
+            f'<t xml:space="preserve">{escape(value)}</t></is></c>'
+        )
+    raise TypeError(f"Tipo de valor não suportado em {ref}: {type(value).__name__}")
+
+
+def parse_number(text):
+    # Mesma conversão do openpyxl: inteiro, a não ser que tenha ponto ou expoente
+    if "." in text or "E" in text or "e" in text:
+        return float(text)
+    return int(text)
+
+
+def parse_cell_value(attributes, body, shared_strings):
+    # Valor da célula como o openpyxl devolveria (fórmulas como "=...")
+    body = body or ""
+    formula = FORMULA_RE.search(body)
+    if formula:
+        return "=" + unescape(formula.group(1) or "")
+    kind = TYPE_RE.search(attributes)
+    kind = kind.group(1) if kind else "n"
+    if kind == "inlineStr":
+        return "".join(unescape(t or "") for t in TEXT_RE.findall(body))
+    value = VALUE_RE.search(body)
+    if value is None:
+        return None
+    text = value.group(1)
+    if kind == "s":
+        return shared_strings()[int(text)]
+    if kind == "b":
+        return text == "1"
+    if kind in ("str", "e"):
+        return unescape(text)
+    if kind == "d":  # Data ISO 8601, como o openpyxl
+        return from_ISO8601(text)
+    return parse_number(text)
+
+
+def read_sheet_values(xml, shared_strings):
+    values = {}
+    match = SHEET_DATA_RE.search(xml)
+    if match is None or not match.group(1):
+        return values
+    row = 0
+    for row_match in ROW_RE.finditer(match.group(1)):
+        number = ROW_NUMBER_RE.search(row_match.group(1))
+        row = int(number.group(1)) if number else row + 1
+        column = 0
+        for cell in CELL_RE.finditer(row_match.group(2) or ""):
+            ref = CELL_REF_RE.search(cell.group(1))
+            column = column_index_from_string(ref.group(1)) if ref else column + 1
+            value = parse_cell_value(cell.group(1), cell.group(2), shared_strings)
+            if value is not None:
+                values[(row, column)] = value
+    return values
+
+
+def patch_row(attributes, body, row, values):
+    # Substitui/insere as células de uma linha mantendo o estilo das existentes
+    cells = {}
+    column = 0
+    for match in CELL_RE.finditer(body or ""):
+        ref = CELL_REF_RE.search(match.group(1))
+        column = column_index_from_string(ref.group(1)) if ref else column + 1
+        cells[column] = match.group(0)
+    for column, value in values.items():
+        old = cells.get(column)
+        style = STYLE_RE.search(old.split(">", 1)[0]) if old else None
+        cells[column] = cell_xml(
+            f"{get_column_letter(column)}{row}", value, style.group(1) if style else None
+        )
+    attributes = SPANS_RE.sub("", attributes)  # spans é só uma dica e pode ficar errado
+    return f"<row{attributes}>{''.join(cells[c] for c in sorted(cells))}</row>"
+
+
+def patch_sheet_data(content, values_by_row):
+    out = []
+    pending = sorted(values_by_row)
+    row = 0
+    for match in ROW_RE.finditer(content):
+        number = ROW_NUMBER_RE.search(match.group(1))
+        row = int(number.group(1)) if number else row + 1
+        while pending and pending[0] < row:
+            new_row = pending.pop(0)
+            out.append(patch_row(f' r="{new_row}"', "", new_row, values_by_row[new_row]))
+        if pending and pending[0] == row:
+            pending.pop(0)
+            out.append(patch_row(match.group(1), match.group(2), row, values_by_row[row]))
+        else:
+            out.append(match.group(0))
+    for new_row in pending:
+        out.append(patch_row(f' r="{new_row}"', "", new_row, values_by_row[new_row]))
+    return "".join(out)
+
+
+def patch_sheet_xml(xml, values):
+    values_by_row = {}
+    for (row, column), value in values.items():
+        values_by_row.setdefault(row, {})[column] = value
+
+    match = SHEET_DATA_RE.search(xml)
+    if match is None:
+        raise ValueError("Planilha sem sheetData; formato não suportado")
+    content = patch_sheet_data(match.group(1) or "", values_by_row)
+    return f"{xml[:match.start()]}<sheetData>{content}</sheetData>{xml[match.end():]}"
+
+
+def force_full_calc(xml):
+    match = CALC_PR_RE.search(xml)
+    if match is None:
+        position = AFTER_CALC_PR_RE.search(xml).start()
+        return f'{xml[:position]}<calcPr fullCalcOnLoad="1"/>{xml[position:]}'
+    tag = match.group(0)
+    if "fullCalcOnLoad=" in tag:
+        new_tag = re.sub(r'fullCalcOnLoad="[^"]*"', 'fullCalcOnLoad="1"', tag)
+    else:
+        new_tag = tag.replace("<calcPr", '<calcPr fullCalcOnLoad="1"', 1)
+    return xml[: match.start()] + new_tag + xml[match.end():]
+
+
+class XlsxSheet:
+    def __init__(self, book, title, part):
+        self.book = book
+        self.title = title
+        self.part = part
+        self.values = {}
+        self._existing = None
+        self._merged_cells = None
+
+    def cell(self, row, column, value=None):
+        if value is not None:
+            self.values[(row, column)] = value
+        return XlsxCell(self, row, column)
+
+    def current_value(self, row, column):
+        if (row, column) in self.values:
+            return self.values[(row, column)]
+        if self._existing is None:
+            self._existing = read_sheet_values(
+                self.book.read_part(self.part), self.book.shared_strings
+            )
+        return self._existing.get((row, column))
+
+    @property
+    def merged_cells(self):
+        if self._merged_cells is None:
+            xml = self.book.read_part(self.part)
+            self._merged_cells = MultiCellRange(" ".join(MERGE_RE.findall(xml)))
+        return self._merged_cells
+
+
+class XlsxCell:
+    # Só o que o ConversorCore usa do Cell do openpyxl: ler e gravar .value
+    __slots__ = ("sheet", "row", "column")
+
+    def __init__(self, sheet, row, column):
+        self.sheet = sheet
+        self.row = row
+        self.column = column
+
+    @property
+    def value(self):
+        return self.sheet.current_value(self.row, self.column)
+
+    @value.setter
+    def value(self, value):
+        self.sheet.values[(self.row, self.column)] = value
+
+
+class XlsxChartsheet:
+    # Abas de gráfico aparecem em sheetnames, mas não têm células
+    def __init__(self, title, part):
+        self.title = title
+        self.part = part
+
+
+class XlsxWorkbook:
+    def __init__(self, path):
+        self.path = path
+        with zipfile.ZipFile(path) as zf:
+            root_rels = ET.fromstring(zf.read("_rels/.rels"))
+            self.workbook_part = next(
+                resolve_target("", rel.get("Target"))
+                for rel in root_rels.iter(f"{{{NS_PKG_REL}}}Relationship")
+                if rel.get("Type") == OFFICE_DOCUMENT
+            )
+            workbook = ET.fromstring(zf.read(self.workbook_part))
+            rels = ET.fromstring(zf.read(rels_part(self.workbook_part)))
+
+        targets = {
+            rel.get("Id"): (rel.get("Type"), resolve_target(self.workbook_part, rel.get("Target")))
+            for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship")
+        }
+        self._shared_strings_part = next(
+            (part for kind, part in targets.values() if kind == SHARED_STRINGS), None
+        )
+        self._shared_strings = None
+        self._sheets = {}
+        for sheet in workbook.iter(f"{{{NS_MAIN}}}sheet"):
+            kind, part = targets[sheet.get(f"{{{NS_REL}}}id")]
+            name = sheet.get("name")
+            if kind == WORKSHEET:
+                self._sheets[name] = XlsxSheet(self, name, part)
+            else:
+                self._sheets[name] = XlsxChartsheet(name, part)
+
+    @property
+    def sheetnames(self):
+        return list(self._sheets)
+
+    def __getitem__(self, name):
+        return self._sheets[name]
+
+    def create_sheet(self, name):
+        raise ValueError(f"A planilha '{name}' não existe no template")
+
+    def shared_strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            if self._shared_strings_part:
+                root = ET.fromstring(self.read_part(self._shared_strings_part))
+                for item in root.iter(f"{{{NS_MAIN}}}si"):
+                    # Texto simples (<t>) ou rich text (<r><t>); ignora <rPh>
+                    texts = [item.find(f"{{{NS_MAIN}}}t")] + [
+                        run.find(f"{{{NS_MAIN}}}t") for run in item.iter(f"{{{NS_MAIN}}}r")
+                    ]
+                    self._shared_strings.append(
+                        "".join(t.text or "" for t in texts if t is not None)
+                    )
+        return self._shared_strings
+
+    def read_part(self, part):
+        with zipfile.ZipFile(self.path) as zf:
+            return zf.read(part).decode("utf-8")
+
+    def save(self, path):
+        patched = {
+            sheet.part: sheet.values
+            for sheet in self._sheets.values()
+            if isinstance(sheet, XlsxSheet) and sheet.values
+        }
+        workbook_rels = rels_part(self.workbook_part)
+
+        # Grava em um arquivo temporário na mesma pasta e renomeia no final
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(self.path) as zin, zipfile.ZipFile(tmp, "w") as zout:
+                for info in zin.infolist():
+                    name = info.filename
+                    if name == "xl/calcChain.xml":
+                        continue
+                    if name in patched:
+                        xml = patch_sheet_xml(zin.read(info).decode("utf-8"), patched[name])
+                    elif name == self.workbook_part:
+                        xml = force_full_calc(zin.read(info).decode("utf-8"))
+                    elif name == workbook_rels:
+                        xml = CALC_CHAIN_REL_RE.sub("", zin.read(info).decode("utf-8"))
+                    elif name == "[Content_Types].xml":
+                        xml = CALC_CHAIN_TYPE_RE.sub("", zin.read(info).decode("utf-8"))
+                    else:
+                        # Demais partes: conteúdo copiado sem alteração
+                        with zin.open(info) as src, zout.open(copy_info(info), "w") as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+                        continue
+                    zout.writestr(copy_info(info), xml.encode("utf-8"))
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.path = path
+        for sheet in self._sheets.values():
+            if isinstance(sheet, XlsxSheet):
+                sheet.values = {}
+                sheet._existing = None
@@ -0,0 +1,2 @@
+# Benchmarks do Reports Converter. Rodar a partir da raiz do repositório:
+#     python -m benchmarks.run_benchmarks --days 1 7 28 56 --output resultados.json
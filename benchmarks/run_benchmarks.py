@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from ConversorCore import (
+    EXTRACT_WORKERS,
+    REPORT_KEYS,
+    ReportCache,
+    build_configurations,
+    extract_all_blocks,
+    findalldays,
+    normalize_days,
+    open_target_workbook,
+    process_configuration,
+    save_target_workbook,
+)
+from benchmarks.synthetic import generate_job
+
+
+def run_stages(
+    job, work_folder, legacy_xlsx=False, workers=EXTRACT_WORKERS, direct_xlsx=True
+):
+    # Executa o mesmo fluxo do run_job, medindo cada etapa separadamente
+    timings = {}
+
+    def timed(stage, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+        return result
+
+    def log(message):
+        pass
+
+    target = os.path.join(work_folder, "target.xlsx")
+    shutil.copy(job["excel_target"], target)
+    cache = ReportCache()
+
+    # findalldays com cache vazio inclui a leitura do primeiro report
+    timed("findalldays", findalldays, job[REPORT_KEYS[0]], cache)
+    for key in REPORT_KEYS[1:]:
+        timed("parse", cache.get, job[key])
+
+    configurations = build_configurations(
+        target, job, normalize_days(job["days"]), job["start_diurno"], job["end_diurno"]
+    )
+    blocks = timed(
+        "extract", extract_all_blocks, configurations, log, cache, workers=workers
+    )
+
+    writer = timed("load", open_target_workbook, target, direct=direct_xlsx)
+    for config, config_blocks in zip(configurations, blocks):
+        timed(
+            "process_configuration",
+            process_configuration,
+            config,
+            work_folder,
+            log,
+            cache=cache,
+            legacy_xlsx=legacy_xlsx,
+            writer=writer,
+            blocks=None if legacy_xlsx else config_blocks,
+        )
+    timed("save", save_target_workbook, writer, target)
+
+    return timings
+
+
+def count_rows(csv_file):
+    with open(csv_file, "rb") as f:
+        return sum(1 for _ in f) - 1  # Sem o cabeçalho
+
+
+def benchmark_size(
+    days, repeat, legacy_xlsx, sparsity, measure_memory, workers, direct_xlsx
+):
+    with tempfile.TemporaryDirectory(prefix="conversor_bench_") as folder:
+        job = generate_job(os.path.join(folder, "inputs"), days=days, sparsity=sparsity)
+        input_rows = sum(count_rows(job[key]) for key in REPORT_KEYS)
+        input_bytes = sum(os.path.getsize(job[key]) for key in REPORT_KEYS)
+
+        runs = [
+            run_stages(job, folder, legacy_xlsx, workers, direct_xlsx)
+            for _ in range(repeat)
+        ]
+        # Para cada etapa fica o menor tempo entre as repetições
+        stages = {stage: min(run[stage] for run in runs) for stage in runs[0]}
+        total_seconds = min(sum(run.values()) for run in runs)
+
+        peak_memory = None
+        if measure_memory:
+            tracemalloc.start()
+            run_stages(job, folder, legacy_xlsx, workers, direct_xlsx)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    return {
+        "days": days,
+        "input_rows": input_rows,
+        "input_bytes": input_bytes,
+        "total_seconds": round(total_seconds, 4),
+        "rows_per_second": round(input_rows / total_seconds, 1),
+        "peak_memory_bytes": peak_memory,
+        "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do processamento com reports sintéticos")
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 14, 28, 56], help="Tamanhos dos reports, em dias")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por tamanho (vale o menor tempo)")
+    parser.add_argument("--sparsity", type=float, default=0.1, help="Fração de intervalos sem contagem")
+    parser.add_argument("--legacy-xlsx", action="store_true", help="Usa o caminho antigo com xlsx temporários")
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="Threads da extração dos blocos")
+    parser.add_argument("--no-direct-xlsx", action="store_true", help="Carrega e grava o workbook inteiro com openpyxl")
+    parser.add_argument("--no-memory", action="store_true", help="Não mede o pico de memória")
+    parser.add_argument("--output", help="Grava os resultados neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for days in args.days:
+        result = benchmark_size(
+            days, args.repeat, args.legacy_xlsx, args.sparsity, not args.no_memory, args.workers,
+            not args.no_direct_xlsx,
+        )
+        results.append(result)
+        stages = "  ".join(f"{stage}={seconds:.3f}s" for stage, seconds in result["stages"].items())
+        print(f"{days:>3} dia(s): {result['total_seconds']:.3f}s  {result['rows_per_second']:.0f} linhas/s  {stages}", file=sys.stderr)
+
+    report = {
+        "environment": environment(),
+        "options": {"repeat": args.repeat, "sparsity": args.sparsity, "legacy_xlsx": args.legacy_xlsx, "workers": args.workers, "direct_xlsx": not args.no_direct_xlsx},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# Tempo de abertura do ConversorGUI. Rodar a partir da raiz do repositório, em
+# uma máquina com interface gráfica:
+#     python -m benchmarks.startup --repeat 5 --output startup.json
+#
+# Cada medição abre o programa de verdade (python ConversorGUI.py, um processo
+# novo) com CONVERSOR_STARTUP_PROBE apontando para um arquivo temporário; o main
+# registra nele os dois marcos e fecha a janela (ver record_startup):
+#   first_frame  desde o início do processo até o main desenhar a interface
+#                (page.add enviado para a janela)
+#   ready        até o processamento estar carregado (Engine.load: ConversorCore,
+#                pandas, openpyxl e os caches), que roda em segundo plano
+# Também são medidos, em processos sem janela, os custos que compõem esses marcos:
+#   interpreter    python -c pass, o custo fixo de abrir o Python
+#   import         importar o ConversorGUI (flet e o que mais vier junto)
+#   engine_load    Engine.load, rodando sozinho depois do import
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.run_benchmarks import environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import ConversorGUI
+imported = time.perf_counter()
+heavy = sorted(m for m in ("pandas", "numpy", "openpyxl") if m in sys.modules)
+ConversorGUI.Engine().load()
+loaded = time.perf_counter()
+print(json.dumps({"import": imported - started, "engine_load": loaded - imported, "loaded_before_frame": heavy}))
+"""
+
+
+def run_python(code):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True
+    )
+    return time.perf_counter() - started, result.stdout
+
+
+def open_window(timeout):
+    # Abre o programa e devolve {marco: segundos desde o início do processo}
+    fd, probe = tempfile.mkstemp(suffix=".startup")
+    os.close(fd)
+    try:
+        started = time.time()
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "ConversorGUI.py")],
+            cwd=ROOT,
+            env={**os.environ, "CONVERSOR_STARTUP_PROBE": probe},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        events = {}
+        deadline = time.time() + timeout
+        while "ready" not in events and time.time() < deadline and process.poll() is None:
+            time.sleep(0.01)
+            with open(probe, encoding="utf-8") as f:
+                events = {
+                    event: float(moment) - started
+                    for event, moment in (line.split() for line in f if line.strip())
+                }
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if "ready" not in events:
+            raise RuntimeError(
+                "O ConversorGUI não abriu a janela (sem interface gráfica ou tempo esgotado)"
+            )
+        return events
+    finally:
+        os.remove(probe)
+
+
+def measure(repeat, timeout):
+    samples = {"interpreter": [], "import": [], "engine_load": [], "first_frame": [], "ready": []}
+    loaded_before_frame = None
+    for _ in range(repeat):
+        samples["interpreter"].append(run_python("pass")[0])
+        _, output = run_python(IMPORT_PROBE)
+        probe = json.loads(output.strip().splitlines()[-1])
+        samples["import"].append(probe["import"])
+        samples["engine_load"].append(probe["engine_load"])
+        loaded_before_frame = probe["loaded_before_frame"]
+        events = open_window(timeout)
+        samples["first_frame"].append(events["first_frame"])
+        samples["ready"].append(events["ready"])
+
+    # Vale o menor tempo de cada medida
+    result = {f"{name}_seconds": round(min(values), 4) for name, values in samples.items()}
+    result["loaded_before_frame"] = loaded_before_frame
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da abertura do ConversorGUI")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale o menor tempo)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Segundos para a janela abrir")
+    parser.add_argument("--output", help="Grava os resultados neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    result = measure(args.repeat, args.timeout)
+    print(
+        f"primeiro frame: {result['first_frame_seconds']:.3f}s  "
+        f"pronto: {result['ready_seconds']:.3f}s  "
+        f"(interpretador: {result['interpreter_seconds']:.3f}s, "
+        f"import: {result['import_seconds']:.3f}s, "
+        f"Engine.load: {result['engine_load_seconds']:.3f}s)",
+        file=sys.stderr,
+    )
+    if result["loaded_before_frame"]:
+        print(f"Importados antes da janela: {', '.join(result['loaded_before_frame'])}", file=sys.stderr)
+
+    report = {
+        "environment": environment(),
+        "options": {"repeat": args.repeat},
+        "results": result,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
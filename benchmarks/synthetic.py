@@ -0,0 +1,90 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+COUNT_COLUMNS = 14  # Colunas C:P do report
+DAY_BLOCK_ROWS = 103  # Linhas por dia nas planilhas Contagens (ver calculate_start_row_array)
+
+
+def generate_report(
+    path,
+    days=7,
+    start_date="2025-03-03",
+    date_column="horaDas",
+    sparsity=0.0,
+    empty_days=0,
+    interval_minutes=15,
+    seed=0,
+):
+    # Gera um CSV no formato dos reports do PERCI: horaDas/horaAte em intervalos de
+    # 15 minutos, seguidas das colunas de contagem (C:P) e de uma coluna de total.
+    # sparsity é a fração de intervalos sem nenhuma contagem; os últimos
+    # empty_days dias ficam zerados (não aparecem no findalldays).
+    rng = np.random.default_rng(seed)
+    periods = days * 24 * 60 // interval_minutes
+    start = pd.date_range(start_date, periods=periods, freq=f"{interval_minutes}min")
+    end = start + pd.Timedelta(minutes=interval_minutes)
+
+    counts = rng.integers(0, 60, size=(periods, COUNT_COLUMNS))
+    counts[rng.random(periods) < sparsity] = 0
+    if empty_days:
+        counts[-empty_days * (periods // days):] = 0
+
+    df = pd.DataFrame(counts, columns=[f"Classe {i + 1}" for i in range(COUNT_COLUMNS)])
+    df.insert(0, "horaAte", end.strftime("%Y-%m-%d %H:%M:%S"))
+    df.insert(0, date_column, start.strftime("%Y-%m-%d %H:%M:%S"))
+    df["Total"] = counts.sum(axis=1)
+    df.to_csv(path, index=False)
+    return path
+
+
+def generate_template(path, days=7, formulas=True):
+    # Gera um template com as planilhas que o processamento espera:
+    # Títulos e Contagens A/B (EXCLUIR), com um bloco de 103 linhas por dia.
+    wb = Workbook()
+    titulos = wb.active
+    titulos.title = "Títulos"
+    titulos["A20"] = "Arquivo"
+    titulos["A23"] = "Data"
+
+    for sheet_name in ["Contagens A (EXCLUIR)", "Contagens B (EXCLUIR)"]:
+        ws = wb.create_sheet(sheet_name)
+        for day in range(days):
+            # Linha 1-based do 00:00 do dia: o processamento grava a partir de
+            # startrow + 1 = 17 + 103 * dia (ver calculate_start_row_array)
+            first_row = 17 + day * DAY_BLOCK_ROWS
+            ws.cell(row=first_row - 1, column=1, value=f"Dia {day + 1}")
+            for slot in range(96):
+                row = first_row + slot
+                ws.cell(row=row, column=3, value=f"{slot // 4:02d}:{slot % 4 * 15:02d}")
+                if formulas:
+                    ws.cell(row=row, column=18, value=f"=SUM(D{row}:Q{row})")
+
+    wb.save(path)
+    return path
+
+
+def generate_job(folder, days=7, sparsity=0.0, seed=0):
+    # Cria template e os quatro reports em folder e devolve o job para run_job
+    os.makedirs(folder, exist_ok=True)
+    reports = {}
+    for i, key in enumerate(
+        ["report_daytime_a", "report_daytime_b", "report_evening_a", "report_evening_b"]
+    ):
+        reports[key] = generate_report(
+            os.path.join(folder, f"{key}.csv"), days=days, sparsity=sparsity, seed=seed + i
+        )
+    template = generate_template(os.path.join(folder, "template.xlsx"), days=min(days, 7))
+
+    first_day = datetime.strptime("2025-03-03", "%Y-%m-%d")
+    selected = pd.date_range(first_day, periods=min(days, 7), freq="D")
+    return {
+        "excel_target": template,
+        **reports,
+        "start_diurno": "06:00",
+        "end_diurno": "18:00",
+        "days": [d.strftime("%d-%m-%Y") for d in selected],
+    }
@@ -0,0 +1,81 @@
+import hashlib
+
+import pytest
+from openpyxl import load_workbook
+
+from benchmarks.synthetic import generate_job
+from ConversorCheckpoint import RunCheckpoint
+from ConversorCore import run_job
+
+BLOCKS = 3 * 2 * 7  # Configurações x grupos x dias
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def run(job):
+    messages, events = [], []
+    run_job(job, messages.append, progress=events.append)
+    extracted = [e for e in events if e["stage"] == "extract"]
+    return messages, extracted
+
+
+@pytest.fixture
+def job(tmp_path):
+    job = generate_job(str(tmp_path), days=7)
+    job["disk_cache"] = False
+    return job
+
+
+def test_rerun_skips_every_block(job):
+    _, extracted = run(job)
+    assert len(extracted) == BLOCKS
+    digest = file_digest(job["excel_target"])
+
+    messages, extracted = run(job)
+    assert extracted == []
+    assert f"{BLOCKS} bloco(s) sem alteração desde a última execução foram mantidos." in messages
+    assert "O arquivo Excel já está atualizado; nada foi alterado." in messages
+    assert file_digest(job["excel_target"]) == digest
+
+
+def test_start_diurno_redoes_only_affected_blocks(job):
+    run(job)
+    job["start_diurno"] = "07:00"
+    messages, extracted = run(job)
+
+    # Muda o fim da Madrugada e o início do Diurno; o Noturno não depende dele
+    assert {e["configuration"] for e in extracted} == {"Madrugada", "Período Diurno"}
+    assert len(extracted) == 2 * 2 * 7
+    assert "14 bloco(s) sem alteração desde a última execução foram mantidos." in messages
+
+
+def test_modified_workbook_invalidates_manifest(job):
+    run(job)
+    assert RunCheckpoint(job["excel_target"]).blocks
+
+    book = load_workbook(job["excel_target"])
+    book["Contagens A (EXCLUIR)"]["D17"] = 12345
+    book.save(job["excel_target"])
+
+    assert RunCheckpoint(job["excel_target"]).blocks == {}
+    _, extracted = run(job)
+    assert len(extracted) == BLOCKS
+    assert load_workbook(job["excel_target"])["Contagens A (EXCLUIR)"]["D17"].value != 12345
+
+
+def test_more_days_than_the_template_holds(tmp_path):
+    # Sem "days", vale cada dia com contagem do report (10 aqui); o template
+    # só tem lugar para 7 e o resume não pode quebrar com os que sobram
+    job = generate_job(str(tmp_path), days=10)
+    job["disk_cache"] = False
+    del job["days"]
+
+    _, extracted = run(job)
+    assert len(extracted) == BLOCKS
+    assert max(e["day"] for e in extracted) == "09-03-2025"
+    messages, extracted = run(job)
+    assert extracted == []
+    assert f"{BLOCKS} bloco(s) sem alteração desde a última execução foram mantidos." in messages
@@ -0,0 +1,32 @@
+import pytest
+from openpyxl import load_workbook
+
+from benchmarks.synthetic import generate_job
+from ConversorCore import run_job
+
+
+@pytest.fixture
+def job(tmp_path):
+    job = generate_job(str(tmp_path), days=3)
+    job["disk_cache"] = False
+    return job
+
+
+def test_unchecked_first_day_uses_first_day_with_date(job):
+    job["days"] = [None, "04-03-2025", "05-03-2025"]
+    run_job(job, lambda message: None)
+
+    book = load_workbook(job["excel_target"])
+    assert book["Títulos"]["B23"].value == "04/03/2025"
+    # O primeiro dia fica vazio; o segundo começa 103 linhas abaixo
+    counts = book["Contagens A (EXCLUIR)"]
+    assert counts["D17"].value is None
+    assert counts["D120"].value is not None
+
+
+def test_no_checked_day_fails_before_reading_reports(job):
+    job["days"] = [None, "empty"]
+    events = []
+    with pytest.raises(ValueError, match="Nenhum dia foi selecionado"):
+        run_job(job, lambda message: None, progress=events.append)
+    assert [e["stage"] for e in events] == ["load"]
@@ -0,0 +1,57 @@
+import pytest
+
+from ConversorCore import parse_report, parse_reports
+
+HEADER = "horaDas,horaAte,c0,c1\n"
+
+
+def write_report(tmp_path, name, rows, header=HEADER):
+    path = tmp_path / name
+    path.write_text(header + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def row(start, end, c0, c1):
+    return f"2025-03-03 {start}:00,2025-03-03 {end}:00,{c0},{c1}"
+
+
+def test_overlapping_files_keep_the_first_picked(tmp_path):
+    # O segundo arquivo começa antes e repete 00:15 e 00:30 com outros valores
+    first = write_report(tmp_path, "first.csv", [row("00:15", "00:30", 1, 1), row("00:30", "00:45", 2, 2)])
+    second = write_report(
+        tmp_path,
+        "second.csv",
+        [row("00:00", "00:15", 9, 9), row("00:15", "00:30", 8, 8), row("00:30", "00:45", 7, 7), row("00:45", "01:00", 6, 6)],
+    )
+
+    df, date_column = parse_reports([first, second])
+    assert date_column == "horaDas"
+    assert df[date_column].is_monotonic_increasing
+    assert df.index.is_monotonic_increasing
+    assert df[date_column].dt.strftime("%H:%M").tolist() == ["00:00", "00:15", "00:30", "00:45"]
+    assert df["c0"].tolist() == [9, 1, 2, 6]
+
+    # Escolhidos na outra ordem, vale o outro arquivo
+    df, _ = parse_reports([second, first])
+    assert df["c0"].tolist() == [9, 8, 7, 6]
+
+
+def test_merged_report_matches_a_single_file(tmp_path):
+    rows = [row("00:00", "00:15", 1, 2), row("00:15", "00:30", 3, 4), row("00:30", "00:45", 5, 6)]
+    single = write_report(tmp_path, "single.csv", rows)
+    late = write_report(tmp_path, "late.csv", rows[2:])
+    early = write_report(tmp_path, "early.csv", rows[:2])
+
+    merged, date_column = parse_reports([late, early])
+    expected, _ = parse_report(single)
+    assert merged[date_column].tolist() == expected[date_column].tolist()
+    assert merged[["c0", "c1"]].to_numpy().tolist() == expected[["c0", "c1"]].to_numpy().tolist()
+
+
+def test_different_columns_raise(tmp_path):
+    first = write_report(tmp_path, "first.csv", [row("00:00", "00:15", 1, 2)])
+    other = write_report(
+        tmp_path, "other.csv", ["2025-03-03 00:15:00,2025-03-03 00:30:00,1,2"], header="horaDas,horaAte,c0,c2\n"
+    )
+    with pytest.raises(ValueError):
+        parse_reports([first, other])
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ConversorCore import findalldays, parse_report
+
+HEADER = "horaDas,horaAte,c0,c1\n"  # Contagens nas colunas C:P
+
+
+def write_report(tmp_path, rows, header=HEADER):
+    path = tmp_path / "report.csv"
+    path.write_text(header + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_integer_counts_are_int32(tmp_path):
+    path = write_report(
+        tmp_path,
+        ["2025-03-03 00:00:00,2025-03-03 00:15:00,1,2", "2025-03-03 00:15:00,2025-03-03 00:30:00,4,5"],
+    )
+    df, date_column = parse_report(path)
+    assert date_column == "horaDas"
+    assert list(df.columns) == ["horaDas", "c0", "c1"]
+    assert (df.dtypes[["c0", "c1"]] == np.int32).all()
+    assert df[["c0", "c1"]].to_numpy().tolist() == [[1, 2], [4, 5]]
+
+
+def test_decimal_counts_are_not_truncated(tmp_path):
+    path = write_report(
+        tmp_path,
+        ["2025-03-03 00:00:00,2025-03-03 00:15:00,1.5,2", "2025-03-03 00:15:00,2025-03-03 00:30:00,4,5"],
+    )
+    df, _ = parse_report(path)
+    assert df["c0"].dtype == np.float64
+    assert df["c0"].tolist() == [1.5, 4.0]
+    assert df["c1"].dtype == np.int32
+
+
+def test_text_counts_become_blank(tmp_path):
+    path = write_report(
+        tmp_path,
+        ["2025-03-03 00:00:00,2025-03-03 00:15:00,x,2", "2025-03-03 00:15:00,2025-03-03 00:30:00,4,5"],
+    )
+    df, _ = parse_report(path)
+    assert df["c0"].dtype == np.float32
+    assert np.isnan(df["c0"].iloc[0]) and df["c0"].iloc[1] == 4
+    assert df["c1"].dtype == np.int32
+
+
+def test_blank_cells(tmp_path):
+    path = write_report(
+        tmp_path,
+        ["2025-03-03 00:00:00,2025-03-03 00:15:00,,2", "2025-03-03 00:15:00,2025-03-03 00:30:00,4,5"],
+    )
+    df, _ = parse_report(path)
+    assert df["c0"].dtype == np.float32
+    assert np.isnan(df["c0"].iloc[0]) and df["c0"].iloc[1] == 4
+
+
+@pytest.mark.parametrize(
+    "values, blank, dtype",
+    [
+        ([2**24 + 1, 1], False, np.int32),  # Completa e cabe em int32
+        ([2**24 + 1, None], True, np.float64),  # float32 perderia precisão
+        ([3_000_000_000, 1], False, np.float64),  # Não cabe em int32
+    ],
+)
+def test_large_counts_keep_their_value(tmp_path, values, blank, dtype):
+    rows = [
+        f"2025-03-03 00:{m:02d}:00,2025-03-03 00:{m + 15:02d}:00,{'' if v is None else v},1"
+        for m, v in zip((0, 15), values)
+    ]
+    path = write_report(tmp_path, rows)
+    df, _ = parse_report(path)
+    assert df["c0"].dtype == dtype
+    assert df["c0"].iloc[0] == values[0]
+    if blank:
+        assert np.isnan(df["c0"].iloc[1])
+    else:
+        assert df["c0"].iloc[1] == 1
+    assert len(findalldays(path)) == 1
+
+
+def test_non_perci_date_format(tmp_path):
+    path = write_report(
+        tmp_path,
+        ["2025/03/04 06:15,2025/03/04 06:30,1,2", "2025/03/03 23:45,2025/03/04 00:00,4,5"],
+        header="HoraDas,horaAte,c0,c1\n",
+    )
+    df, date_column = parse_report(path)
+    assert date_column == "HoraDas"
+    assert pd.api.types.is_datetime64_any_dtype(df[date_column])
+    # Ordenado pelo horário, com o índice igual à coluna de data
+    assert list(df.index) == [pd.Timestamp("2025-03-03 23:45"), pd.Timestamp("2025-03-04 06:15")]
+    assert df["c0"].tolist() == [4, 1]
+    assert [d["data"] for d in findalldays(path)] == ["03-03-2025", "04-03-2025"]
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from ConversorCore import index_by_time, split_report, write_blocks
+
+WINDOW = ("03-03-2025", "06:00", "07:00")  # 5 intervalos: 06:00 ... 07:00
+
+
+def report(times, values):
+    df = pd.DataFrame(
+        {
+            "horaDas": pd.to_datetime([f"2025-03-03 {t}" for t in times]),
+            "c0": np.array([v for v, _ in values], dtype="int32"),
+            "c1": np.array([v for _, v in values], dtype="int32"),
+        }
+    )
+    return index_by_time(df, "horaDas")
+
+
+def split(times, values):
+    return split_report(report(times, values), "horaDas", [WINDOW])[WINDOW]
+
+
+def write_over_old_values(block):
+    # Planilha com valores de uma execução anterior em todo o bloco
+    ws = Workbook().active
+    for row in range(17, 22):
+        for column in (4, 5):
+            ws.cell(row=row, column=column, value=-1)
+    write_blocks(ws, [(16, block, "Diurno")])
+    return [[ws.cell(row=row, column=column).value for column in (4, 5)] for row in range(17, 22)]
+
+
+def test_complete_window_is_the_plain_slice():
+    block = split(["06:00", "06:15", "06:30", "06:45", "07:00"], [(i, i) for i in range(5)])
+    assert block.dtype == np.int32
+    assert block.tolist() == [[i, i] for i in range(5)]
+
+
+def test_gap_in_the_middle():
+    block = split(["06:00", "06:15", "06:45", "07:00"], [(1, 1), (2, 2), (4, 4), (5, 5)])
+    assert block.shape == (5, 2)
+    assert np.isnan(block[2]).all()
+    assert block[3].tolist() == [4, 4]  # Não sobe para o lugar do 06:30
+    assert write_over_old_values(block) == [[1, 1], [2, 2], [None, None], [4, 4], [5, 5]]
+
+
+def test_missing_slots_at_the_end():
+    block = split(["06:00", "06:15", "06:30"], [(1, 1), (2, 2), (3, 3)])
+    assert block.shape == (5, 2)
+    assert np.isnan(block[3:]).all()
+    assert write_over_old_values(block) == [[1, 1], [2, 2], [3, 3], [None, None], [None, None]]
+
+
+def test_two_records_in_the_same_slot_keep_the_first():
+    block = split(
+        ["06:00", "06:15", "06:20", "06:30", "06:45", "07:00"],
+        [(1, 1), (2, 2), (99, 99), (3, 3), (4, 4), (5, 5)],
+    )
+    assert block.shape == (5, 2)
+    assert block.tolist() == [[1, 1], [2, 2], [3, 3], [4, 4], [5, 5]]
+    assert write_over_old_values(block) == [[1, 1], [2, 2], [3, 3], [4, 4], [5, 5]]
+
+
+@pytest.mark.parametrize("times", [[], ["05:45", "07:15"]], ids=["empty", "outside"])
+def test_window_without_records(times):
+    block = split(times, [(1, 1)] * len(times))
+    assert block.shape == (5, 2)
+    assert np.isnan(block).all()
+    assert write_over_old_values(block) == [[None, None]] * 5
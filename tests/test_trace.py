@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.synthetic import generate_job
+from ConversorCore import run_job
+from ConversorTrace import tracer
+
+
+@pytest.fixture
+def traced():
+    tracer.enable()
+    tracer.drain()
+    yield tracer
+    tracer.disable()
+    tracer.drain()
+
+
+def test_extract_windows_keep_configuration_and_group(tmp_path, traced):
+    job = generate_job(str(tmp_path), days=7)
+    job.update(disk_cache=False, resume=False)
+    run_job(job, lambda message: None)
+
+    summary = traced.summary()
+    windows = {key: total for key, total in summary.items() if key.startswith("extract_window / ")}
+    assert len(windows) == 3 * 2  # Configurações x grupos
+    assert all(total["count"] == 7 for total in windows.values())
+    # As linhas por janela somam as linhas de cada report
+    assert sum(total["rows"] for total in windows.values()) == summary["extract"]["rows"]
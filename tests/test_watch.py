@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from ConversorWatch import InboxWatcher
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "P01.xlsx").write_bytes(b"")
+    return inbox
+
+
+def ready(watcher):
+    # Duas varreduras: na primeira todo arquivo novo ainda conta como mudando
+    watcher.ready_jobs(set(), set())
+    return watcher.ready_jobs(set(), set())
+
+
+def make_watcher(inbox):
+    return InboxWatcher(str(inbox), str(inbox), str(inbox / "old"), settle=0)
+
+
+def touch(inbox, *names):
+    for name in names:
+        (inbox / name).write_text("horaDas\n", encoding="utf-8")
+
+
+def test_waits_for_every_movement(inbox):
+    watcher = make_watcher(inbox)
+    touch(inbox, "P01_A_dia.csv", "P01_B_dia.csv", "P01_A_noite.csv")
+    assert ready(watcher) == []
+
+    touch(inbox, "P01_B_noite.csv")
+    jobs = ready(watcher)
+    assert [point for point, *_ in jobs] == ["P01"]
+    job = jobs[0][2]
+    assert job["report_evening_b"] == [str(inbox / "P01_B_noite.csv")]
+
+
+def test_several_files_per_movement(inbox):
+    watcher = make_watcher(inbox)
+    touch(inbox, "P01_A_dia.csv", "P01_A_dia_2.csv", "P01_B_dia.csv", "P01_A_noite.csv", "P01_B_noite.csv")
+    (_, _, job, inputs), = ready(watcher)
+    assert len(job["report_daytime_a"]) == 2
+    assert len(inputs) == 5
+
+
+def test_job_file_lists_the_expected_reports(inbox):
+    watcher = make_watcher(inbox)
+    (inbox / "P01.job.json").write_text(
+        json.dumps(
+            {
+                "excel_target": "P01.xlsx",
+                "report_daytime_a": "P01_A_dia.csv",
+                "report_daytime_b": "P01_B_dia.csv",
+                "start_diurno": "06:00",
+                "end_diurno": "18:00",
+            }
+        ),
+        encoding="utf-8",
+    )
+    touch(inbox, "P01_A_dia.csv")
+    assert ready(watcher) == []
+
+    touch(inbox, "P01_B_dia.csv")
+    (point, _, job, inputs), = ready(watcher)
+    assert point == "P01"
+    assert "report_evening_a" not in job
+    assert len(inputs) == 3
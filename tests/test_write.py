@@ -0,0 +1,72 @@
+import hashlib
+
+import numpy as np
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from benchmarks.synthetic import generate_job
+from ConversorCore import clear_cell, run_job, set_cell, write_blocks
+from ConversorXlsx import XlsxWorkbook
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.fixture(params=[True, False], ids=["direct", "openpyxl"])
+def sheet(request, tmp_path):
+    path = tmp_path / "book.xlsx"
+    wb = Workbook()
+    wb.active.title = "Contagens A (EXCLUIR)"
+    wb.active["D17"] = 5
+    wb.active["E17"] = "texto"
+    wb.save(path)
+    book = XlsxWorkbook(str(path)) if request.param else load_workbook(path)
+    return book["Contagens A (EXCLUIR)"]
+
+
+def test_set_cell_counts_only_changes(sheet):
+    assert set_cell(sheet, 17, 4, 5) == 0
+    assert set_cell(sheet, 17, 4, 6) == 1
+    assert set_cell(sheet, 17, 4, 6) == 0
+    assert set_cell(sheet, 17, 5, None) == 0  # None não altera a célula
+    assert sheet.cell(row=17, column=5).value == "texto"
+    assert set_cell(sheet, 18, 4, 1) == 1
+
+
+def test_clear_cell(sheet):
+    assert clear_cell(sheet, 17, 5) == 1
+    assert sheet.cell(row=17, column=5).value is None
+    assert clear_cell(sheet, 17, 5) == 0
+    assert clear_cell(sheet, 30, 30) == 0
+
+
+def test_write_blocks_counts(sheet):
+    block = np.array([[5, 1], [np.nan, 2]])
+    # D17 já tem 5; E17 (texto) vira 1; D18 já está vazia; E18 = 2; W17 e W18
+    assert write_blocks(sheet, [(16, block, "Diurno")]) == 4
+    assert write_blocks(sheet, [(16, block, "Diurno")]) == 0
+    assert sheet.cell(row=17, column=23).value == "Diurno"
+
+    # NaN limpa o que estava na célula
+    assert write_blocks(sheet, [(16, np.array([[np.nan, 1]]), "Diurno")]) == 1
+    assert sheet.cell(row=17, column=4).value is None
+
+
+@pytest.mark.parametrize("direct", [True, False], ids=["direct", "openpyxl"])
+def test_rerun_changes_nothing_and_does_not_save(tmp_path, direct):
+    job = generate_job(str(tmp_path), days=2)
+    job.update(direct_xlsx=direct, resume=False, disk_cache=False)
+
+    messages = []
+    run_job(job, messages.append)
+    changed = next(m for m in messages if "célula(s) alterada(s)" in m)
+    assert int(changed.split()[0]) > 0
+    digest = file_digest(job["excel_target"])
+
+    messages = []
+    run_job(job, messages.append)
+    assert "0 célula(s) alterada(s)." in messages
+    assert "Nenhum valor mudou; o arquivo Excel não foi salvo." in messages
+    assert file_digest(job["excel_target"]) == digest
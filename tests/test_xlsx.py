@@ -0,0 +1,113 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from ConversorXlsx import parse_cell_value, patch_sheet_xml, read_sheet_values
+
+SHARED = ["Títulos", "P01 & P02"]
+
+
+def sheet(rows):
+    return (
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f"<sheetPr/><sheetData>{rows}</sheetData><mergeCells/></worksheet>"
+    )
+
+
+def read(xml):
+    return read_sheet_values(xml, lambda: SHARED)
+
+
+@pytest.mark.parametrize(
+    "attributes, body, expected",
+    [
+        (' r="A1"', "<v>12</v>", 12),
+        (' r="A1"', "<v>1.5</v>", 1.5),
+        (' r="A1"', "<v>1E-3</v>", 0.001),
+        (' r="A1" t="s"', "<v>1</v>", "P01 & P02"),
+        (' r="A1" t="inlineStr"', "<is><t>a &lt; b</t></is>", "a < b"),
+        (' r="A1" t="inlineStr"', "<is><r><t>ab</t></r><r><t>cd</t></r></is>", "abcd"),
+        (' r="A1" t="b"', "<v>1</v>", True),
+        (' r="A1" t="b"', "<v>0</v>", False),
+        (' r="A1" t="str"', "<f>A2&amp;A3</f><v>xy</v>", "=A2&A3"),
+        (' r="A1"', "<f>SUM(D17:Q17)</f><v>10</v>", "=SUM(D17:Q17)"),
+        (' r="A1" t="e"', "<v>#DIV/0!</v>", "#DIV/0!"),
+        (' r="A1" t="d"', "<v>2025-03-03T00:00:00</v>", datetime(2025, 3, 3)),
+        (' r="A1" s="3"', None, None),
+    ],
+)
+def test_parse_cell_value(attributes, body, expected):
+    assert parse_cell_value(attributes, body, lambda: SHARED) == expected
+
+
+def test_read_sheet_values_positions():
+    xml = sheet(
+        '<row r="2" spans="1:3"><c r="A2" t="s"><v>0</v></c><c r="C2"><v>7</v></c></row>'
+        # Linha e células sem r: seguem a anterior
+        '<row><c><v>1</v></c><c t="b"><v>1</v></c></row>'
+        '<row r="10"/>'
+    )
+    assert read(xml) == {(2, 1): "Títulos", (2, 3): 7, (3, 1): 1, (3, 2): True}
+
+
+def test_read_empty_sheet():
+    assert read(sheet("").replace("<sheetData></sheetData>", "<sheetData/>")) == {}
+
+
+def test_patch_existing_row_keeps_style_and_other_cells():
+    xml = sheet(
+        '<row r="17" spans="1:23"><c r="C17" s="4" t="s"><v>0</v></c>'
+        '<c r="D17" s="5"><v>1</v></c><c r="R17" s="6"><f>SUM(D17:Q17)</f><v>1</v></c></row>'
+    )
+    patched = patch_sheet_xml(xml, {(17, 4): 9, (17, 5): 2.5, (17, 23): "Diurno"})
+
+    assert read(patched) == {
+        (17, 3): "Títulos",
+        (17, 4): 9,
+        (17, 5): 2.5,
+        (17, 18): "=SUM(D17:Q17)",
+        (17, 23): "Diurno",
+    }
+    assert '<c r="D17" s="5"><v>9</v></c>' in patched
+    assert "spans=" not in patched
+    # Células em ordem de coluna, como o Excel exige
+    assert patched.index('r="C17"') < patched.index('r="D17"') < patched.index('r="E17"')
+    assert patched.index('r="R17"') < patched.index('r="W17"')
+    assert "<sheetPr/>" in patched and "<mergeCells/>" in patched
+
+
+def test_patch_inserts_rows_in_order():
+    xml = sheet('<row r="5"><c r="A5"><v>1</v></c></row><row r="9"><c r="A9"><v>2</v></c></row>')
+    patched = patch_sheet_xml(xml, {(2, 1): "a", (7, 2): True, (12, 3): 3})
+
+    assert read(patched) == {(2, 1): "a", (5, 1): 1, (7, 2): True, (9, 1): 2, (12, 3): 3}
+    rows = [int(r) for r in re.findall(r'<row r="(\d+)"', patched)]
+    assert rows == sorted(rows) == [2, 5, 7, 9, 12]
+
+
+def test_patch_empty_sheet_data():
+    xml = sheet("").replace("<sheetData></sheetData>", "<sheetData/>")
+    assert read(patch_sheet_xml(xml, {(1, 1): 1})) == {(1, 1): 1}
+
+
+def test_patch_strings_are_inline_and_escaped():
+    patched = patch_sheet_xml(sheet(""), {(1, 1): "P01 <A & B>"})
+    assert 't="inlineStr"' in patched
+    assert read(patched) == {(1, 1): "P01 <A & B>"}
+
+
+def test_patch_none_empties_cell_keeping_style():
+    xml = sheet('<row r="1"><c r="A1" s="2"><v>5</v></c><c r="B1"><v>6</v></c></row>')
+    patched = patch_sheet_xml(xml, {(1, 1): None})
+    assert '<c r="A1" s="2"/>' in patched
+    assert read(patched) == {(1, 2): 6}
+
+
+def test_patch_replaces_shared_string_and_formula():
+    xml = sheet(
+        '<row r="20"><c r="B20" t="s"><v>0</v></c><c r="C20"><f>A1</f><v>0</v></c></row>'
+    )
+    patched = patch_sheet_xml(xml, {(20, 2): "novo", (20, 3): 4})
+    assert read(patched) == {(20, 2): "novo", (20, 3): 4}
+    assert "<f>" not in patched
@@ -0,0 +1,139 @@
+import zipfile
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.chart import BarChart, Reference
+from openpyxl.styles import Font, PatternFill
+
+from ConversorXlsx import XlsxWorkbook
+
+COUNT_SHEETS = ["Contagens A (EXCLUIR)", "Contagens B (EXCLUIR)"]
+# O que o processamento grava: contagens, rótulo do período e títulos
+WRITES = {
+    "Contagens A (EXCLUIR)": {(17, 4): 12, (17, 5): 0, (18, 4): 3.5, (17, 23): "Diurno", (40, 4): 7},
+    "Contagens B (EXCLUIR)": {(17, 4): 1, (120, 17): 2},
+    "Títulos": {(20, 2): "P01", (23, 2): "03/03/2025", (21, 3): "P01_A_dia"},
+}
+
+
+@pytest.fixture
+def template(tmp_path):
+    # Template com estilos, fórmulas, gráfico, aba de gráfico e células mescladas
+    path = tmp_path / "template.xlsx"
+    wb = Workbook()
+    titulos = wb.active
+    titulos.title = "Títulos"
+    titulos["B20"] = "Arquivo"
+    titulos["B20"].font = Font(bold=True, color="FF0000")
+    titulos["B23"].number_format = "dd/mm/yyyy"
+    titulos.merge_cells("E1:H2")
+    for name in COUNT_SHEETS:
+        ws = wb.create_sheet(name)
+        for row in range(17, 41):
+            ws.cell(row=row, column=3, value=f"{(row - 17) // 4:02d}:{(row - 17) % 4 * 15:02d}")
+            ws.cell(row=row, column=4, value=row)
+            ws.cell(row=row, column=18, value=f"=SUM(D{row}:Q{row})")
+        ws["D17"].fill = PatternFill("solid", fgColor="FFFF00")
+        ws["D17"].number_format = "0.00"
+    chart = BarChart()
+    chart.add_data(Reference(wb[COUNT_SHEETS[0]], min_col=18, min_row=17, max_row=40))
+    titulos.add_chart(chart, "J5")
+    chartsheet = wb.create_chartsheet("Gráfico")
+    chart = BarChart()
+    chart.add_data(Reference(wb[COUNT_SHEETS[1]], min_col=18, min_row=17, max_row=40))
+    chartsheet.add_chart(chart)
+    wb.save(path)
+    return path
+
+
+def write_direct(template, path):
+    book = XlsxWorkbook(str(template))
+    for sheet_name, cells in WRITES.items():
+        for (row, column), value in cells.items():
+            book[sheet_name].cell(row=row, column=column).value = value
+    book.save(str(path))
+    return book
+
+
+def write_openpyxl(template, path):
+    book = load_workbook(template)
+    for sheet_name, cells in WRITES.items():
+        for (row, column), value in cells.items():
+            book[sheet_name].cell(row=row, column=column).value = value
+    book.save(path)
+
+
+def all_values(path):
+    book = load_workbook(path)
+    return {
+        name: {
+            (cell.row, cell.column): cell.value
+            for row in book[name].iter_rows()
+            for cell in row
+            if cell.value is not None
+        }
+        for name in book.sheetnames
+        if name != "Gráfico"
+    }
+
+
+def test_untouched_parts_are_copied_byte_for_byte(template, tmp_path):
+    out = tmp_path / "out.xlsx"
+    book = write_direct(template, out)
+    patched = {book[name].part for name in WRITES} | {book.workbook_part}
+
+    with zipfile.ZipFile(template) as before, zipfile.ZipFile(out) as after:
+        assert before.namelist() == after.namelist()
+        for info in before.infolist():
+            if info.filename not in patched:
+                assert before.read(info) == after.read(info.filename), info.filename
+                assert after.getinfo(info.filename).compress_type == info.compress_type
+        assert 'fullCalcOnLoad="1"' in after.read(book.workbook_part).decode("utf-8")
+
+
+def test_charts_and_styles_survive(template, tmp_path):
+    out = tmp_path / "out.xlsx"
+    write_direct(template, out)
+    book = load_workbook(out)
+
+    assert book.sheetnames == ["Títulos", *COUNT_SHEETS, "Gráfico"]
+    assert len(book["Títulos"]._charts) == 1
+    assert len(book["Gráfico"]._charts) == 1
+    assert [str(r) for r in book["Títulos"].merged_cells.ranges] == ["E1:H2"]
+
+    titulos = book["Títulos"]
+    assert titulos["B20"].value == "P01"
+    assert titulos["B20"].font.bold and titulos["B20"].font.color.rgb == "00FF0000"
+    assert titulos["B23"].number_format == "dd/mm/yyyy"
+    counts = book[COUNT_SHEETS[0]]
+    assert counts["D17"].value == 12
+    assert counts["D17"].fill.fgColor.rgb == "00FFFF00"
+    assert counts["D17"].number_format == "0.00"
+
+
+def test_same_values_as_openpyxl(template, tmp_path):
+    direct, reference = tmp_path / "direct.xlsx", tmp_path / "openpyxl.xlsx"
+    write_direct(template, direct)
+    write_openpyxl(template, reference)
+    assert all_values(direct) == all_values(reference)
+
+
+def test_reads_back_what_openpyxl_reads(template, tmp_path):
+    out = tmp_path / "out.xlsx"
+    write_direct(template, out)
+    book = XlsxWorkbook(str(out))
+    for sheet_name, values in all_values(out).items():
+        sheet = book[sheet_name]
+        for (row, column), value in values.items():
+            assert sheet.cell(row=row, column=column).value == value
+
+
+def test_save_twice_from_saved_file(template, tmp_path):
+    # Depois do save o workbook continua usável e relê o arquivo novo
+    out = tmp_path / "out.xlsx"
+    book = write_direct(template, out)
+    book[COUNT_SHEETS[0]].cell(row=17, column=4).value = 99
+    book.save(str(out))
+    values = all_values(out)
+    assert values[COUNT_SHEETS[0]][(17, 4)] == 99
+    assert values[COUNT_SHEETS[0]][(18, 4)] == 3.5